@@ -1,8 +1,13 @@
 from .batty import batty
+from .batty_profile import batty_profile
+from .cooccurrence import cooccurrence
 from .csv_to_matrix import csv_to_matrix
+from .entropy_pyramid import entropy_pyramid
+from .entropy_tracker import EntropyTracker
 from .karlstrom import karlstrom
 from .leibovici import leibovici
 from .oneill import oneill
+from .plotting import render_plot, render_plots
 from .shannon import shannon
 from .shannon_z import shannon_z
 from .spatial_partition import spatial_partition
@@ -10,4 +15,4 @@ from .spatial_partition import spatial_partition
 print(
     "GeoEntropy is in a very early version (0.2.0), no guarantee for correctness. Source code is available at https://github.com/maxkryschi/geoentropy")
 
-__all__ = ['batty', 'csv_to_matrix', 'karlstrom', 'leibovici', 'oneill', 'shannon', 'shannon_z', 'spatial_partition']
+__all__ = ['EntropyTracker', 'batty', 'batty_profile', 'cooccurrence', 'csv_to_matrix', 'entropy_pyramid', 'karlstrom', 'leibovici', 'oneill', 'render_plot', 'render_plots', 'shannon', 'shannon_z', 'spatial_partition']
@@ -1,15 +1,22 @@
 import numpy as np
 import pandas as pd
-from .spatial_partition import spatial_partition
+from scipy import sparse
+from .plotting import _show_plot
+from .results import BattyResult, EntropyRange, _validate_detail
+from .point_events import _count_event_partitions
+from .spatial_partition import spatial_partition, _count_sparse_partitions
+from .summed_area import _partition_into_blocks
 
 
 def _validate_data_matrix(data_matrix):
-    if not isinstance(data_matrix, np.ndarray) or data_matrix.ndim != 2:
+    if not (isinstance(data_matrix, np.ndarray) or sparse.issparse(data_matrix)) or data_matrix.ndim != 2:
         raise ValueError("For grid data, please provide the dataset as a 2D matrix.")
     return data_matrix
 
 
 def _dichotomize_data_matrix(data_matrix, category):
+    if sparse.issparse(data_matrix):
+        return _dichotomize_sparse_data_matrix(data_matrix, category)
     data_vector = data_matrix.ravel()
     unique_values = np.unique(data_vector)
     if category not in unique_values:
@@ -17,58 +24,117 @@ def _dichotomize_data_matrix(data_matrix, category):
     return (data_vector == category).astype(int).reshape(data_matrix.shape)
 
 
-def _calculate_area_data(data_with_partitions):
-    area_data = data_with_partitions.groupby('partition').agg(
-        abs_freq=pd.NamedAgg(column='category', aggfunc='sum'),
-        area_size=pd.NamedAgg(column='partition', aggfunc='count')
-    )
+def _validate_input(data_matrix, events, partition_mode):
+    if (data_matrix is None) == (events is None):
+        raise ValueError("Please provide either a data matrix or event coordinates.")
+    if events is not None and partition_mode == 'blocks':
+        raise ValueError("Block partitions are only available for grid data.")
+
+
+def _validate_partition_mode(partition_mode):
+    if partition_mode not in ('voronoi', 'blocks'):
+        raise ValueError("Partition mode should be set to either 'voronoi' or 'blocks'.")
+    return partition_mode
+
+
+def _dichotomize_sparse_data_matrix(data_matrix, category):
+    # The implicit background cannot be the category of interest, otherwise the result would be dense
+    if category == 0:
+        raise ValueError("For sparse matrices, please select a category other than the background 0.")
+    data_matrix = sparse.csr_matrix(data_matrix)
+    if category not in data_matrix.data:
+        raise ValueError("Please select a category among the ones in the dataset.")
+    return (data_matrix == category).astype(int)
+
+
+def _calculate_area_arrays(dichotomized_data_matrix, partition_indices):
+    area_sizes = np.bincount(partition_indices)
+    positive_counts = np.bincount(partition_indices[dichotomized_data_matrix.ravel() == 1], minlength=len(area_sizes))
+    partitions = np.flatnonzero(area_sizes)
+    return partitions, positive_counts[partitions], area_sizes[partitions]
+
+
+def _calculate_area_data(partitions, positive_counts, area_sizes):
+    area_data = pd.DataFrame({'abs_freq': positive_counts, 'area_size': area_sizes},
+                             index=pd.Index(partitions, name='partition'))
     area_data['rel_freq'] = area_data['abs_freq'] / area_data['abs_freq'].sum()
     return area_data
 
 
-def _calculate_batty_entropy(area_data, sub_area_sizes, rescale):
-    if min(sub_area_sizes) < 1:
+def _calculate_batty_entropy(rel_freq, sub_area_sizes, rescale):
+    min_area = np.min(sub_area_sizes)
+    # Only partitions with positive cells contribute, so the logarithms are taken of those alone
+    positive = rel_freq > 0
+    rel_freq, sub_area_sizes = rel_freq[positive], sub_area_sizes[positive]
+    if min_area < 1:
         if not rescale:
             raise ValueError(
                 "Results may be unreliable due to computational issues in taking logarithms of the sub-areas size, since there are areas with size < 1. We suggest to re-run the function with rescale = True")
         else:
-            cc = 1 / min(sub_area_sizes) + 1e-02
+            cc = 1 / min_area + 1e-02
             resc_Tg = sub_area_sizes * cc
-            batty_terms_rescaled = np.where(area_data['rel_freq'] > 0,
-                                            area_data['rel_freq'] * np.log(resc_Tg / area_data['rel_freq']), 0)
-            batty_entropy = np.sum(batty_terms_rescaled) - np.log(cc)
+            batty_entropy = np.sum(rel_freq * np.log(resc_Tg / rel_freq)) - np.log(cc)
             print(
                 "Some sub-areas have size < 1, so they have been internally rescaled to avoid computational issues. The entropy in the output refers to the original area scale.")
     else:
-        batty_entropy = np.sum(
-            np.where(area_data['rel_freq'] > 0, area_data['rel_freq'] * np.log(sub_area_sizes / area_data['rel_freq']),
-                     0))
+        batty_entropy = np.sum(rel_freq * np.log(sub_area_sizes / rel_freq))
     return batty_entropy
 
 
 def _calculate_batty_entropy_range(sub_area_sizes):
-    return [max(0, np.log(min(sub_area_sizes))), np.log(sum(sub_area_sizes))]
-
-
-def batty(data_matrix, category=1, cell_size=1, partitions=10, window=None, rescale=True, plot_output=True):
-    data_matrix = _validate_data_matrix(data_matrix)
-    dichotomized_data_matrix = _dichotomize_data_matrix(data_matrix, category)
-
-    partition_result = spatial_partition(dichotomized_data_matrix, partitions=partitions, cell_size=cell_size,
-                                         window=window, plot_output=plot_output)
-    partition_coordinates = partition_result['partition_coordinates']
-    data_with_partitions = partition_result['data_with_partitions']
+    return [max(0, np.log(np.min(sub_area_sizes))), np.log(np.sum(sub_area_sizes))]
+
+
+def batty(data_matrix=None, category=1, cell_size=1, partitions=10, window=None, rescale=True, plot_output=True,
+          detail='full', partition_mode='voronoi', events=None, weights=None):
+    detail = _validate_detail(detail)
+    partition_mode = _validate_partition_mode(partition_mode)
+    _validate_input(data_matrix, events, partition_mode)
+    if events is None:
+        data_matrix = _validate_data_matrix(data_matrix)
+        dichotomized_data_matrix = _dichotomize_data_matrix(data_matrix, category)
+
+    if events is not None:
+        partition_coordinates, partition_ids, positive_counts, Tg, plot_spec = _count_event_partitions(
+            events, weights, partitions, window, cell_size)
+    elif partition_mode == 'blocks':
+        partition_ids, positive_counts, Tg, partition_coordinates, plot_spec = _partition_into_blocks(
+            dichotomized_data_matrix, partitions, cell_size=cell_size, window=window)
+    elif sparse.issparse(dichotomized_data_matrix):
+        partition_coordinates, partition_ids, positive_counts, Tg, plot_spec = _count_sparse_partitions(
+            dichotomized_data_matrix, partitions, cell_size, window)
+    else:
+        partition_result = spatial_partition(dichotomized_data_matrix, partitions=partitions, cell_size=cell_size,
+                                             window=window, plot_output=False, detail='arrays')
+        partition_coordinates, plot_spec = partition_result.partition_coordinates, partition_result.plot_spec
+        partition_ids, positive_counts, Tg = _calculate_area_arrays(dichotomized_data_matrix,
+                                                                    partition_result.partition_indices)
+    if plot_output:
+        _show_plot(plot_spec)
+    rel_freq = positive_counts / positive_counts.sum()
+
+    batty_entropy = _calculate_batty_entropy(rel_freq, Tg, rescale)
+    batty_entropy_range = _calculate_batty_entropy_range(Tg)
 
-    area_data = _calculate_area_data(data_with_partitions)
-    Tg = area_data['area_size'].values
+    if detail != 'full':
+        return BattyResult(
+            batty_entropy=batty_entropy,
+            entropy_range=EntropyRange(*batty_entropy_range),
+            relative_batty_entropy=batty_entropy / np.log(np.sum(Tg)),
+            partitions=partition_ids if detail == 'arrays' else None,
+            positive_counts=positive_counts if detail == 'arrays' else None,
+            area_sizes=Tg if detail == 'arrays' else None,
+            partition_coordinates=partition_coordinates if detail == 'arrays' else None,
+            plot_spec=plot_spec if detail == 'arrays' else None
+        )
 
-    batty_entropy = _calculate_batty_entropy(area_data, Tg, rescale)
-    batty_entropy_range = _calculate_batty_entropy_range(Tg)
+    area_data = _calculate_area_data(partition_ids, positive_counts, Tg)
 
     return {
         'batty_entropy': batty_entropy,
         'entropy_range': {'minimum': batty_entropy_range[0], 'maximum': batty_entropy_range[1]},
-        'relative_batty_entropy': batty_entropy / np.log(sum(Tg)),
+        'relative_batty_entropy': batty_entropy / np.log(np.sum(Tg)),
         'area_data': area_data.reset_index(),
-        'partition_coordinates': partition_coordinates
+        'partition_coordinates': partition_coordinates,
+        'plot_spec': plot_spec
     }
@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+import matplotlib.pyplot as plt
+from scipy import sparse
+from .batty import _validate_data_matrix, _dichotomize_data_matrix, _calculate_batty_entropy, \
+    _calculate_batty_entropy_range
+from .results import BattyProfileResult, _validate_detail
+from .summed_area import _summed_area_table, _block_edges, _block_sums, _block_areas, _sparse_block_sums
+
+
+def _count_level_blocks(dichotomized_data_matrix, table, row_edges, col_edges):
+    # Sparse matrices have no summed-area table, their positive cells are binned into the blocks of every level instead
+    if table is None:
+        return _sparse_block_sums(dichotomized_data_matrix, row_edges, col_edges)
+    return _block_sums(table, row_edges, col_edges)
+
+
+def _calculate_level_entropies(dichotomized_data_matrix, table, rescale):
+    # Level l splits both axes into 2**l blocks, down to one block per cell
+    num_rows, num_cols = dichotomized_data_matrix.shape
+    levels, row_blocks, col_blocks, positive_counts, batty_entropies, entropy_ranges = [], [], [], [], [], []
+    level = 1
+    while True:
+        row_edges = _block_edges(num_rows, 2 ** level)
+        col_edges = _block_edges(num_cols, 2 ** level)
+        block_counts = _count_level_blocks(dichotomized_data_matrix, table, row_edges, col_edges)
+        area_sizes = _block_areas(row_edges, col_edges).ravel()
+        rel_freq = block_counts.ravel() / block_counts.sum()
+
+        levels.append(level)
+        row_blocks.append(len(row_edges) - 1)
+        col_blocks.append(len(col_edges) - 1)
+        positive_counts.append(block_counts)
+        batty_entropies.append(_calculate_batty_entropy(rel_freq, area_sizes, rescale))
+        entropy_ranges.append(_calculate_batty_entropy_range(area_sizes))
+        if 2 ** level >= max(num_rows, num_cols):
+            break
+        level += 1
+    return (np.array(levels), np.array(row_blocks), np.array(col_blocks), positive_counts, np.array(batty_entropies),
+            np.array(entropy_ranges))
+
+
+def _plot_profile(levels, relative_batty_entropies):
+    plt.plot(levels, relative_batty_entropies, marker='o')
+    plt.title("Batty Entropy Profile")
+    plt.xlabel('Level (2^level blocks per axis)')
+    plt.ylabel('Relative Batty Entropy')
+    plt.show()
+
+
+def batty_profile(data_matrix, category=1, rescale=True, plot_output=False, detail='full'):
+    data_matrix = _validate_data_matrix(data_matrix)
+    detail = _validate_detail(detail)
+    dichotomized_data_matrix = _dichotomize_data_matrix(data_matrix, category)
+
+    table = None if sparse.issparse(dichotomized_data_matrix) else _summed_area_table(dichotomized_data_matrix)
+    levels, row_blocks, col_blocks, positive_counts, batty_entropies, entropy_ranges = _calculate_level_entropies(
+        dichotomized_data_matrix, table, rescale)
+    relative_batty_entropies = batty_entropies / entropy_ranges[:, 1]
+
+    if plot_output:
+        _plot_profile(levels, relative_batty_entropies)
+
+    if detail != 'full':
+        return BattyProfileResult(
+            levels=levels,
+            row_blocks=row_blocks,
+            col_blocks=col_blocks,
+            batty_entropy=batty_entropies,
+            relative_batty_entropy=relative_batty_entropies,
+            positive_counts=tuple(positive_counts) if detail == 'arrays' else None
+        )
+
+    return {
+        'profile': pd.DataFrame({
+            'level': levels,
+            'row_blocks': row_blocks,
+            'col_blocks': col_blocks,
+            'batty_entropy': batty_entropies,
+            'entropy_minimum': entropy_ranges[:, 0],
+            'entropy_maximum': entropy_ranges[:, 1],
+            'relative_batty_entropy': relative_batty_entropies
+        }),
+        'positive_counts': positive_counts
+    }
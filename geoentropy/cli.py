@@ -0,0 +1,233 @@
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from multiprocessing import Pool
+
+import numpy as np
+
+from .batty import batty
+from .csv_to_matrix import csv_to_matrix
+from .karlstrom import karlstrom
+from .leibovici import leibovici
+from .oneill import oneill
+from .results import PartitionPlotSpec
+from .shannon import shannon
+from .shannon_z import shannon_z
+
+SUPPORTED_SUFFIXES = ('.npy', '.npz', '.csv')
+CLI_DETAIL_LEVELS = ('summary', 'arrays')
+
+METRICS = {
+    'shannon': lambda data_matrix, options: shannon(data_matrix, detail=options['detail']),
+    'shannon_z': lambda data_matrix, options: shannon_z(data_matrix, detail=options['detail']),
+    'oneill': lambda data_matrix, options: oneill(data_matrix, plot_output=False, detail=options['detail']),
+    'leibovici': lambda data_matrix, options: leibovici(data_matrix, cell_size=options['cell_size'],
+                                                        critical_distance=options['critical_distance'],
+                                                        plot_output=False, detail=options['detail']),
+    'batty': lambda data_matrix, options: batty(data_matrix, category=options['category'],
+                                                cell_size=options['cell_size'], partitions=options['partitions'],
+                                                plot_output=False, detail=options['detail']),
+    'karlstrom': lambda data_matrix, options: karlstrom(data_matrix, category=options['category'],
+                                                        cell_size=options['cell_size'],
+                                                        partition=options['partitions'],
+                                                        neighbors=options['neighbors'], plot_output=False,
+                                                        detail=options['detail']),
+}
+
+
+def _parse_arguments(argv):
+    parser = argparse.ArgumentParser(
+        prog='geoentropy',
+        description='Compute entropy metrics for .npy/.npz rasters and CSV point files and write one JSON line per '
+                    'input.')
+    parser.add_argument('inputs', nargs='+', help='Files, directories or glob patterns of .npy, .npz or .csv inputs.')
+    parser.add_argument('-o', '--output', required=True, help='JSONL file the records are appended to.')
+    parser.add_argument('-m', '--metrics', default='shannon,shannon_z,oneill',
+                        help=f"Comma-separated metrics out of {', '.join(METRICS)}. Default is "
+                             f"'shannon,shannon_z,oneill'.")
+    parser.add_argument('-d', '--detail', choices=CLI_DETAIL_LEVELS, default='summary',
+                        help="'summary' writes the entropy values only, 'arrays' also the arrays behind them "
+                             "(categories, counts, pairs, partitions). Default is 'summary'.")
+    parser.add_argument('--retry-failed', action='store_true',
+                        help='Process inputs again whose previous record is an error, and replace that record.')
+    parser.add_argument('-w', '--workers', type=int, default=1, help='Number of worker processes. Default is 1.')
+    parser.add_argument('--cell-size', type=float, default=1, help='Cell size of the rasters. Default is 1.')
+    parser.add_argument('--critical-distance', type=float, default=1,
+                        help='Critical distance for Leibovici entropy. Default is 1.')
+    parser.add_argument('--category', type=float, default=1,
+                        help='Category of interest for Batty and Karlström entropy. Default is 1.')
+    parser.add_argument('--partitions', type=int, default=10,
+                        help='Number of partitions for Batty and Karlström entropy. Default is 10.')
+    parser.add_argument('--neighbors', type=int, default=4,
+                        help='Number of neighbors for Karlström entropy. Default is 4.')
+    parser.add_argument('--seed', type=int, default=None,
+                        help='Seed for the random partition centers, so that reruns give identical results.')
+    parser.add_argument('--csv-cell-size', type=float, default=1,
+                        help='Maximum cell size used to rasterize CSV point files. Default is 1.')
+    arguments = parser.parse_args(argv)
+
+    arguments.metrics = [metric.strip() for metric in arguments.metrics.split(',') if metric.strip()]
+    if not arguments.metrics or any(metric not in METRICS for metric in arguments.metrics):
+        parser.error(f"Please select metrics among: {', '.join(METRICS)}.")
+    if arguments.workers < 1:
+        parser.error("The number of workers must be at least 1.")
+    return arguments
+
+
+def _expand_inputs(inputs):
+    # Patterns without any supported file are returned as well, so that a mistyped path does not go unnoticed
+    paths, unmatched = [], []
+    for pattern in inputs:
+        if os.path.isdir(pattern):
+            matches = [os.path.join(pattern, name) for name in sorted(os.listdir(pattern))]
+        elif os.path.isfile(pattern):
+            matches = [pattern]
+        else:
+            matches = sorted(glob.glob(pattern, recursive=True))
+        matches = [path for path in matches if os.path.isfile(path) and path.lower().endswith(SUPPORTED_SUFFIXES)]
+        if not matches:
+            unmatched.append(pattern)
+        paths.extend(matches)
+
+    items = []
+    for path in dict.fromkeys(paths):
+        if path.lower().endswith('.npz'):
+            with np.load(path) as archive:
+                items.extend((f"{path}:{key}", path, key) for key in archive.files)
+        else:
+            items.append((path, path, None))
+    return items, unmatched
+
+
+def _load_records(output_path):
+    records = []
+    if not os.path.exists(output_path):
+        return records
+    with open(output_path, mode='r', encoding='utf-8') as output_file:
+        for line in output_file:
+            try:
+                records.append((line, json.loads(line)))
+            except ValueError:
+                records.append((line, None))
+    return records
+
+
+def _load_completed(output_path, retry_failed=False):
+    # Failed inputs count as done as well, so permanently broken inputs do not add an error record on every run
+    completed = set()
+    for _, record in _load_records(output_path):
+        if isinstance(record, dict) and not (retry_failed and 'error' in record):
+            completed.add(record.get('input'))
+    return completed
+
+
+def _is_retried(record, retried_inputs):
+    return isinstance(record, dict) and 'error' in record and record.get('input') in retried_inputs
+
+
+def _drop_failed_records(output_path, retried_inputs):
+    # The error records of retried inputs are replaced by the records of the retry
+    records = _load_records(output_path)
+    if not any(_is_retried(record, retried_inputs) for _, record in records):
+        return
+    temporary_path = output_path + '.tmp'
+    with open(temporary_path, mode='w', encoding='utf-8') as output_file:
+        output_file.writelines(line for line, record in records if not _is_retried(record, retried_inputs))
+    os.replace(temporary_path, output_path)
+
+
+def _load_matrix(path, key, options):
+    if path.lower().endswith('.csv'):
+        return csv_to_matrix([path], max_cell_size=options['csv_cell_size'])
+    if key is not None:
+        with np.load(path) as archive:
+            return archive[key]
+    return np.load(path)
+
+
+def _summarize(result):
+    summary = {}
+    for name, value in result._asdict().items():
+        if value is None or isinstance(value, PartitionPlotSpec):
+            continue
+        if isinstance(value, tuple):
+            summary[name] = {field: float(bound) for field, bound in value._asdict().items()}
+        elif isinstance(value, np.ndarray):
+            summary[name] = value.tolist()
+        else:
+            summary[name] = float(value)
+    return summary
+
+
+def _process(task):
+    item_id, path, key, metrics, options = task
+    start = time.perf_counter()
+    try:
+        data_matrix = _load_matrix(path, key, options)
+        record = {'input': item_id, 'rows': int(data_matrix.shape[0]),
+                  'cols': int(data_matrix.shape[1]) if data_matrix.ndim > 1 else 1,
+                  'cells': int(data_matrix.size), 'metrics': {}}
+        for metric in metrics:
+            if options['seed'] is not None:
+                np.random.seed(options['seed'])
+            record['metrics'][metric] = _summarize(METRICS[metric](data_matrix, options))
+    except Exception as error:
+        record = {'input': item_id, 'error': f"{type(error).__name__}: {error}"}
+    record['seconds'] = time.perf_counter() - start
+    return record
+
+
+def _write_records(records, output_file):
+    processed = failed = cells = 0
+    for record in records:
+        output_file.write(json.dumps(record) + '\n')
+        output_file.flush()
+        processed += 1
+        failed += 'error' in record
+        cells += record.get('cells', 0)
+    return processed, failed, cells
+
+
+def main(argv=None):
+    arguments = _parse_arguments(argv)
+    metrics = arguments.metrics
+    options = {
+        'cell_size': arguments.cell_size,
+        'critical_distance': arguments.critical_distance,
+        'category': arguments.category,
+        'partitions': arguments.partitions,
+        'neighbors': arguments.neighbors,
+        'seed': arguments.seed,
+        'csv_cell_size': arguments.csv_cell_size,
+        'detail': arguments.detail,
+    }
+
+    items, unmatched = _expand_inputs(arguments.inputs)
+    for pattern in unmatched:
+        print(f"No supported inputs ({', '.join(SUPPORTED_SUFFIXES)}) found for '{pattern}'.", file=sys.stderr)
+    completed = _load_completed(arguments.output, retry_failed=arguments.retry_failed)
+    tasks = [(item_id, path, key, metrics, options) for item_id, path, key in items if item_id not in completed]
+    if arguments.retry_failed:
+        _drop_failed_records(arguments.output, {task[0] for task in tasks})
+    skipped = len(items) - len(tasks)
+
+    start = time.perf_counter()
+    with open(arguments.output, mode='a', encoding='utf-8') as output_file:
+        if arguments.workers > 1 and len(tasks) > 1:
+            with Pool(processes=arguments.workers) as pool:
+                processed, failed, cells = _write_records(pool.imap_unordered(_process, tasks), output_file)
+        else:
+            processed, failed, cells = _write_records(map(_process, tasks), output_file)
+    elapsed = time.perf_counter() - start
+
+    print(f"Processed {processed} inputs ({skipped} skipped, {failed} failed) in {elapsed:.2f} s: "
+          f"{processed / elapsed if elapsed > 0 else 0:.2f} items/s, {cells / elapsed if elapsed > 0 else 0:.0f} cells/s",
+          file=sys.stderr)
+    return 1 if failed or unmatched else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
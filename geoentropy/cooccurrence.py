@@ -0,0 +1,277 @@
+import numpy as np
+import pandas as pd
+from math import sqrt, log
+from typing import NamedTuple
+import matplotlib.pyplot as plt
+from scipy import sparse
+from .results import CooccurrenceResult, _validate_detail
+
+ADJACENT_OFFSETS = np.array([[1, 0], [0, 1]])
+BACKGROUND = 0
+_NOT_STORED = -2
+
+
+class _SparseCodes(NamedTuple):
+    shape: tuple
+    keys: np.ndarray
+    codes: np.ndarray
+    background_code: int
+
+
+def _validate_data_matrix(data_matrix):
+    if not isinstance(data_matrix, np.ndarray) and not sparse.issparse(data_matrix):
+        raise ValueError("For grid data, please provide the dataset as a numpy array or a scipy.sparse matrix.")
+    if data_matrix.ndim != 2:
+        raise ValueError("The data matrix must be two-dimensional.")
+
+
+def _validate_cell_size(cell_size):
+    if np.isscalar(cell_size):
+        return np.array([cell_size, cell_size])
+    return np.asarray(cell_size)
+
+
+def _validate_critical_distance(critical_distance, cell_size, num_rows, num_cols):
+    if critical_distance < min(cell_size):
+        raise ValueError("The distance of interest is too small for building any couple.")
+    max_distance = sqrt((num_rows * cell_size[0]) ** 2 + (num_cols * cell_size[1]) ** 2)
+    if critical_distance >= max_distance:
+        raise ValueError(
+            "The chosen distance is equal or larger than the maximum distance over the observation area. Maybe you wish to compute the non-spatial Shannon's entropy of Z instead?")
+
+
+def _validate_sectors(sectors):
+    if not isinstance(sectors, (int, np.integer)) or sectors < 1:
+        raise ValueError("The number of direction sectors must be a positive integer.")
+
+
+def _sparse_cells(data_matrix):
+    # Stored cells that are not background, explicitly stored zeros belong to the background
+    cells = sparse.coo_matrix(data_matrix, copy=True)
+    cells.sum_duplicates()
+    stored = cells.data != BACKGROUND
+    return cells.row[stored].astype(np.int64), cells.col[stored].astype(np.int64), cells.data[stored]
+
+
+def _encode_sparse_categories(data_matrix):
+    num_rows, num_cols = data_matrix.shape
+    rows, cols, values = _sparse_cells(data_matrix)
+    valid = ~np.isnan(values)
+    categories = np.unique(values[valid])
+    has_background = len(values) < num_rows * num_cols
+    if has_background:
+        categories = np.union1d(categories, np.array([BACKGROUND], dtype=categories.dtype))
+
+    codes = np.full(len(values), -1, dtype=np.intp)
+    codes[valid] = np.searchsorted(categories, values[valid])
+    keys = rows * num_cols + cols
+    order = np.argsort(keys)
+    background_code = int(np.searchsorted(categories, BACKGROUND)) if has_background else -1
+    return categories, _SparseCodes((num_rows, num_cols), keys[order], codes[order], background_code)
+
+
+def _encode_categories(data_matrix):
+    if sparse.issparse(data_matrix):
+        return _encode_sparse_categories(data_matrix)
+    valid = ~np.isnan(data_matrix)
+    categories = np.unique(data_matrix[valid])
+    codes = np.full(data_matrix.shape, -1, dtype=np.intp)
+    codes[valid] = np.searchsorted(categories, data_matrix[valid])
+    return categories, codes
+
+
+def _offset_distances(offsets, cell_size):
+    return np.sqrt(offsets[:, 0] ** 2 * cell_size[0] ** 2 + offsets[:, 1] ** 2 * cell_size[1] ** 2)
+
+
+def _offsets_within_distance(num_rows, num_cols, cell_size, critical_distance):
+    # Half-plane of (row, column) offsets, so that every unordered couple of cells is visited once
+    max_row_offset = min(num_rows - 1, int(critical_distance // cell_size[0]) + 1)
+    max_col_offset = min(num_cols - 1, int(critical_distance // cell_size[1]) + 1)
+    row_offsets, col_offsets = np.meshgrid(np.arange(max_row_offset + 1), np.arange(-max_col_offset, max_col_offset + 1),
+                                           indexing='ij')
+    offsets = np.column_stack((row_offsets.ravel(), col_offsets.ravel()))
+    forward = (offsets[:, 0] > 0) | (offsets[:, 1] > 0)
+    within = forward & (_offset_distances(offsets, cell_size) <= critical_distance)
+    return offsets[within]
+
+
+def _lookup_sparse_codes(cells, keys):
+    if len(cells.keys) == 0:
+        return np.full(len(keys), _NOT_STORED, dtype=np.intp)
+    positions = np.minimum(np.searchsorted(cells.keys, keys), len(cells.keys) - 1)
+    return np.where(cells.keys[positions] == keys, cells.codes[positions], _NOT_STORED)
+
+
+def _sparse_cooccurrence_tensor(cells, num_categories, offsets):
+    # Only pairs touching a stored cell are looked up, background-background pairs follow from the grid geometry
+    num_rows, num_cols = cells.shape
+    rows, cols = np.divmod(cells.keys, num_cols)
+    background_code = cells.background_code
+    tensor = np.zeros((len(offsets), num_categories, num_categories), dtype=np.int64)
+    for index, (row_offset, col_offset) in enumerate(offsets):
+        if row_offset >= num_rows or abs(col_offset) >= num_cols:
+            continue
+        key_offset = row_offset * num_cols + col_offset
+
+        as_first = (rows + row_offset < num_rows) & (cols + col_offset >= 0) & (cols + col_offset < num_cols)
+        first_codes = cells.codes[as_first]
+        second_codes = _lookup_sparse_codes(cells, cells.keys[as_first] + key_offset)
+        second_codes = np.where(second_codes == _NOT_STORED, background_code, second_codes)
+
+        as_second = (rows - row_offset >= 0) & (cols - col_offset >= 0) & (cols - col_offset < num_cols)
+        preceding_codes = _lookup_sparse_codes(cells, cells.keys[as_second] - key_offset)
+        after_background = cells.codes[as_second][preceding_codes == _NOT_STORED]
+
+        first_codes = np.concatenate((first_codes, np.full(len(after_background), background_code)))
+        second_codes = np.concatenate((second_codes, after_background))
+        valid = (first_codes >= 0) & (second_codes >= 0)
+        table = np.bincount(first_codes[valid] * num_categories + second_codes[valid], minlength=num_categories ** 2)
+
+        background_pairs = (num_rows - row_offset) * (num_cols - abs(col_offset)) - np.count_nonzero(as_first) - len(
+            after_background)
+        if background_pairs > 0:
+            table[background_code * num_categories + background_code] += background_pairs
+        tensor[index] = table.reshape(num_categories, num_categories)
+    return tensor
+
+
+def _cooccurrence_tensor(codes, num_categories, offsets):
+    # One K x K table per offset: cell (i, j) is the first, cell (i + row_offset, j + col_offset) the second category
+    if isinstance(codes, _SparseCodes):
+        return _sparse_cooccurrence_tensor(codes, num_categories, offsets)
+    num_rows, num_cols = codes.shape
+    tensor = np.zeros((len(offsets), num_categories, num_categories), dtype=np.int64)
+    for index, (row_offset, col_offset) in enumerate(offsets):
+        if row_offset >= num_rows or abs(col_offset) >= num_cols:
+            continue
+        first_cols = slice(max(0, -col_offset), num_cols - max(0, col_offset))
+        second_cols = slice(max(0, col_offset), num_cols + min(0, col_offset))
+        first_codes = codes[:num_rows - row_offset, first_cols]
+        second_codes = codes[row_offset:, second_cols]
+        valid = (first_codes >= 0) & (second_codes >= 0)
+        tensor[index] = np.bincount(first_codes[valid] * num_categories + second_codes[valid],
+                                    minlength=num_categories ** 2).reshape(num_categories, num_categories)
+    return tensor
+
+
+def _observed_pairs(pair_table):
+    num_categories = pair_table.shape[0]
+    pair_counts = pair_table.ravel()
+    observed = np.flatnonzero(pair_counts)
+    return np.column_stack(np.divmod(observed, num_categories)), pair_counts[observed]
+
+
+def _pair_entropy(pair_tables):
+    # Entropy of every K x K table along the leading axis, NaN where a table holds no pairs
+    pair_tables = pair_tables.reshape(len(pair_tables), -1)
+    totals = pair_tables.sum(axis=1, keepdims=True)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        probabilities = pair_tables / totals
+        terms = np.where(probabilities > 0, probabilities * np.log(probabilities), 0)
+    return np.where(totals[:, 0] > 0, -terms.sum(axis=1), np.nan)
+
+
+def _offset_angles(offsets, cell_size):
+    # Direction of each offset in degrees within [0, 180): 0 is along the rows, 90 along the columns
+    return np.degrees(np.arctan2(offsets[:, 0] * cell_size[0], offsets[:, 1] * cell_size[1])) % 180
+
+
+def _assign_sectors(angles, sectors):
+    width = 180 / sectors
+    return np.floor((angles + width / 2) / width).astype(int) % sectors
+
+
+def _group_tables(tensor, groups, num_groups):
+    grouped = np.zeros((num_groups,) + tensor.shape[1:], dtype=np.int64)
+    np.add.at(grouped, groups, tensor)
+    return grouped
+
+
+def _plot_entropy_rose(sector_centers, sector_entropy, sectors):
+    # Directions are undirected, so every sector is drawn on both sides of the rose
+    angles = np.radians(np.concatenate((sector_centers, sector_centers + 180)))
+    values = np.nan_to_num(np.concatenate((sector_entropy, sector_entropy)))
+    ax = plt.subplot(projection='polar')
+    ax.bar(angles, values, width=np.radians(180 / sectors), edgecolor='black', alpha=0.7)
+    ax.set_title('Entropy Rose')
+    plt.show()
+
+
+def cooccurrence(data_matrix, cell_size=1, critical_distance=1, sectors=4, plot_output=False, detail='full'):
+    _validate_data_matrix(data_matrix)
+    detail = _validate_detail(detail)
+    _validate_sectors(sectors)
+    num_rows, num_cols = data_matrix.shape
+    cell_size = _validate_cell_size(cell_size)
+    _validate_critical_distance(critical_distance, cell_size, num_rows, num_cols)
+
+    categories, codes = _encode_categories(data_matrix)
+    offsets = _offsets_within_distance(num_rows, num_cols, cell_size, critical_distance)
+    # The adjacent offsets of O'Neill's entropy are kept even if one of them is beyond the critical distance
+    missing_adjacent = [offset for offset in ADJACENT_OFFSETS if not np.any(np.all(offsets == offset, axis=1))]
+    offsets = np.vstack([offsets] + missing_adjacent) if missing_adjacent else offsets
+    distances = _offset_distances(offsets, cell_size)
+    within_distance = distances <= critical_distance
+
+    tensor = _cooccurrence_tensor(codes, len(categories), offsets)
+    if tensor[within_distance].sum() == 0:
+        raise ValueError("Insufficient data to compute source.")
+
+    angles = _offset_angles(offsets, cell_size)
+    sector_indices = _assign_sectors(angles[within_distance], sectors)
+    sector_tables = _group_tables(tensor[within_distance], sector_indices, sectors)
+    sector_centers = np.arange(sectors) * 180 / sectors
+    sector_entropy = _pair_entropy(sector_tables)
+
+    unique_distances, distance_indices = np.unique(np.round(distances[within_distance], 10), return_inverse=True)
+    distance_tables = _group_tables(tensor[within_distance], distance_indices, len(unique_distances))
+    distance_entropy = _pair_entropy(distance_tables)
+
+    adjacent = np.array([np.flatnonzero(np.all(offsets == offset, axis=1))[0] for offset in ADJACENT_OFFSETS])
+    oneill_entropy = _pair_entropy(tensor[adjacent].sum(axis=0, keepdims=True))[0]
+    leibovici_entropy = _pair_entropy(tensor[within_distance].sum(axis=0, keepdims=True))[0]
+    max_entropy = log(len(categories) ** 2) if len(categories) > 1 else 0
+
+    if plot_output:
+        _plot_entropy_rose(sector_centers, sector_entropy, sectors)
+
+    if detail != 'full':
+        return CooccurrenceResult(
+            oneill_entropy=oneill_entropy,
+            leibovici_entropy=leibovici_entropy,
+            sector_centers=sector_centers,
+            sector_entropy=sector_entropy,
+            distances=unique_distances,
+            distance_entropy=distance_entropy,
+            categories=categories if detail == 'arrays' else None,
+            offsets=offsets if detail == 'arrays' else None,
+            tensor=tensor if detail == 'arrays' else None
+        )
+
+    return {
+        'oneill_entropy': oneill_entropy,
+        'leibovici_entropy': leibovici_entropy,
+        'entropy_range': {'minimum': 0, 'maximum': max_entropy},
+        'sector_entropy': pd.DataFrame({
+            'sector_center': sector_centers,
+            'pairs': sector_tables.sum(axis=(1, 2)),
+            'entropy': sector_entropy,
+            'relative_entropy': sector_entropy / max_entropy if max_entropy > 0 else 0
+        }),
+        'distance_entropy': pd.DataFrame({
+            'distance': unique_distances,
+            'pairs': distance_tables.sum(axis=(1, 2)),
+            'entropy': distance_entropy,
+            'relative_entropy': distance_entropy / max_entropy if max_entropy > 0 else 0
+        }),
+        'categories': categories,
+        'offsets': pd.DataFrame({
+            'row_offset': offsets[:, 0],
+            'col_offset': offsets[:, 1],
+            'distance': distances,
+            'angle': angles,
+            'within_distance': within_distance
+        }),
+        'tensor': tensor
+    }
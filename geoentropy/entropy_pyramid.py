@@ -0,0 +1,132 @@
+import numpy as np
+import pandas as pd
+import matplotlib.pyplot as plt
+from .cooccurrence import ADJACENT_OFFSETS, _validate_cell_size, _encode_categories, _offsets_within_distance, \
+    _cooccurrence_tensor, _pair_entropy
+from .results import PyramidResult, _validate_detail
+
+
+def _validate_data_matrix(data_matrix):
+    if not isinstance(data_matrix, np.ndarray):
+        raise ValueError("For grid data, please provide the dataset as a numpy array.")
+    if data_matrix.ndim != 2:
+        raise ValueError("The data matrix must be two-dimensional.")
+
+
+def _validate_factor(factor):
+    if not isinstance(factor, (int, np.integer)) or factor < 2:
+        raise ValueError("The coarsening factor must be an integer of at least 2.")
+
+
+def _validate_levels(levels):
+    if levels is not None and (not isinstance(levels, (int, np.integer)) or levels < 0):
+        raise ValueError("The number of levels must be a non-negative integer or None.")
+
+
+def _coarsen_codes(codes, num_categories, factor):
+    # Majority category of every factor x factor block, ties go to the smaller code; blocks without data stay -1
+    num_rows, num_cols = codes.shape
+    coarse_rows, coarse_cols = -(-num_rows // factor), -(-num_cols // factor)
+    padded = np.full((coarse_rows * factor, coarse_cols * factor), -1, dtype=np.intp)
+    padded[:num_rows, :num_cols] = codes
+    blocks = padded.reshape(coarse_rows, factor, coarse_cols, factor).transpose(0, 2, 1, 3).reshape(-1, factor ** 2)
+
+    block_indices = np.repeat(np.arange(len(blocks)), factor ** 2)
+    values = blocks.ravel()
+    valid = values >= 0
+    counts = np.bincount(block_indices[valid] * num_categories + values[valid],
+                         minlength=len(blocks) * num_categories).reshape(len(blocks), num_categories)
+    coarse_codes = np.where(counts.max(axis=1) > 0, counts.argmax(axis=1), -1)
+    return coarse_codes.reshape(coarse_rows, coarse_cols)
+
+
+def _build_pyramid(codes, num_categories, factor, levels):
+    pyramid = [codes]
+    while (levels is None and -(-min(pyramid[-1].shape) // factor) >= 2) or \
+            (levels is not None and len(pyramid) <= levels):
+        pyramid.append(_coarsen_codes(pyramid[-1], num_categories, factor))
+    return pyramid
+
+
+def _calculate_level_entropies(codes, num_categories, cell_size, critical_distance):
+    category_counts = np.bincount(codes[codes >= 0], minlength=num_categories)
+    present_categories = np.count_nonzero(category_counts)
+
+    offsets = np.empty((0, 2), dtype=int)
+    if critical_distance >= min(cell_size):
+        offsets = _offsets_within_distance(codes.shape[0], codes.shape[1], cell_size, critical_distance)
+    tensor = _cooccurrence_tensor(codes, num_categories, np.vstack((ADJACENT_OFFSETS, offsets)))
+
+    return (_pair_entropy(category_counts[np.newaxis])[0],
+            _pair_entropy(tensor[:2].sum(axis=0, keepdims=True))[0],
+            _pair_entropy(tensor[2:].sum(axis=0, keepdims=True))[0] if len(offsets) > 0 else np.nan,
+            present_categories)
+
+
+def _plot_pyramid(levels, relative_entropies):
+    for name, values in relative_entropies.items():
+        plt.plot(levels, values, marker='o', label=name)
+    plt.title('Entropy over Resolution')
+    plt.xlabel('Level')
+    plt.ylabel('Relative Entropy')
+    plt.legend()
+    plt.show()
+
+
+def entropy_pyramid(data_matrix, factor=2, levels=None, cell_size=1, critical_distance=None, plot_output=False,
+                    detail='full'):
+    _validate_data_matrix(data_matrix)
+    detail = _validate_detail(detail)
+    _validate_factor(factor)
+    _validate_levels(levels)
+    cell_size = _validate_cell_size(cell_size)
+
+    categories, codes = _encode_categories(data_matrix)
+    if len(categories) == 0:
+        raise ValueError("The data matrix has no categories to compute entropy.")
+    pyramid = _build_pyramid(codes, len(categories), factor, levels)
+
+    level_numbers = np.arange(len(pyramid))
+    shannon_entropy, oneill_entropy, leibovici_entropy, present_categories = np.array([
+        _calculate_level_entropies(level_codes, len(categories), cell_size * factor ** level,
+                                   min(cell_size * factor ** level) if critical_distance is None else critical_distance)
+        for level, level_codes in enumerate(pyramid)
+    ]).T
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        relative_shannon_entropy = shannon_entropy / np.log(present_categories)
+        relative_oneill_entropy = oneill_entropy / np.log(present_categories ** 2)
+        relative_leibovici_entropy = leibovici_entropy / np.log(present_categories ** 2)
+
+    if plot_output:
+        _plot_pyramid(level_numbers, {'Shannon': relative_shannon_entropy, "O'Neill": relative_oneill_entropy,
+                                      'Leibovici': relative_leibovici_entropy})
+
+    if detail != 'full':
+        return PyramidResult(
+            levels=level_numbers,
+            shapes=np.array([level_codes.shape for level_codes in pyramid]),
+            shannon_entropy=shannon_entropy,
+            oneill_entropy=oneill_entropy,
+            leibovici_entropy=leibovici_entropy,
+            categories=categories if detail == 'arrays' else None,
+            codes=tuple(pyramid) if detail == 'arrays' else None
+        )
+
+    return {
+        'pyramid': pd.DataFrame({
+            'level': level_numbers,
+            'rows': [level_codes.shape[0] for level_codes in pyramid],
+            'cols': [level_codes.shape[1] for level_codes in pyramid],
+            'scale': factor ** level_numbers,
+            'categories': present_categories.astype(int),
+            'shannon_entropy': shannon_entropy,
+            'relative_shannon_entropy': relative_shannon_entropy,
+            'oneill_entropy': oneill_entropy,
+            'relative_oneill_entropy': relative_oneill_entropy,
+            'leibovici_entropy': leibovici_entropy,
+            'relative_leibovici_entropy': relative_leibovici_entropy
+        }),
+        'matrices': [np.where(level_codes >= 0, categories[np.maximum(level_codes, 0)], np.nan)
+                     for level_codes in pyramid]
+    }
@@ -0,0 +1,139 @@
+import numpy as np
+from .cooccurrence import ADJACENT_OFFSETS, _validate_cell_size, _validate_critical_distance, _encode_categories, \
+    _offsets_within_distance, _cooccurrence_tensor, _pair_entropy
+from .results import TrackerResult
+
+
+def _validate_data_matrix(data_matrix):
+    if not isinstance(data_matrix, np.ndarray):
+        raise ValueError("For grid data, please provide the dataset as a numpy array.")
+    if data_matrix.ndim != 2:
+        raise ValueError("The data matrix must be two-dimensional.")
+
+
+def _encode_tracked_categories(data_matrix, categories):
+    if categories is None:
+        return _encode_categories(data_matrix)
+    categories = np.unique(np.asarray(categories))
+    observed = np.unique(data_matrix[~np.isnan(data_matrix)])
+    if not np.isin(observed, categories).all():
+        raise ValueError("The given categories must include every category in the data matrix.")
+    valid = ~np.isnan(data_matrix)
+    codes = np.full(data_matrix.shape, -1, dtype=np.intp)
+    codes[valid] = np.searchsorted(categories, data_matrix[valid])
+    return categories, codes
+
+
+def _validate_changes(rows, cols, new_values, shape):
+    rows, cols = np.atleast_1d(rows).astype(np.intp), np.atleast_1d(cols).astype(np.intp)
+    new_values = np.atleast_1d(np.asarray(new_values, dtype=float))
+    if rows.ndim != 1 or rows.shape != cols.shape or rows.shape != new_values.shape:
+        raise ValueError("Rows, cols and new values must be one-dimensional and of the same length.")
+    if np.any((rows < 0) | (rows >= shape[0]) | (cols < 0) | (cols >= shape[1])):
+        raise ValueError("The changed cells must lie within the data matrix.")
+    return rows, cols, new_values
+
+
+def _last_changes(rows, cols, new_values, num_cols):
+    # A cell changed more than once within one update keeps its last value
+    keys = rows * num_cols + cols
+    _, last = np.unique(keys[::-1], return_index=True)
+    last = len(keys) - 1 - last
+    return rows[last], cols[last], new_values[last]
+
+
+def _changed_pairs(codes, changed, rows, cols, offsets, num_categories):
+    # Every pair with at least one changed cell, a pair of two changed cells is only taken where the changed cell is
+    # the first one of the pair
+    num_rows, num_cols = codes.shape
+    pair_indices = [np.empty(0, dtype=np.intp)]
+    for row_offset, col_offset in offsets:
+        second_rows, second_cols = rows + row_offset, cols + col_offset
+        inside = (second_rows < num_rows) & (second_cols >= 0) & (second_cols < num_cols)
+        first_codes = codes[rows[inside], cols[inside]]
+        second_codes = codes[second_rows[inside], second_cols[inside]]
+
+        first_rows, first_cols = rows - row_offset, cols - col_offset
+        inside = (first_rows >= 0) & (first_cols >= 0) & (first_cols < num_cols)
+        inside[inside] = ~changed[first_rows[inside], first_cols[inside]]
+        first_codes = np.concatenate((first_codes, codes[first_rows[inside], first_cols[inside]]))
+        second_codes = np.concatenate((second_codes, codes[rows[inside], cols[inside]]))
+
+        valid = (first_codes >= 0) & (second_codes >= 0)
+        pair_indices.append(first_codes[valid] * num_categories + second_codes[valid])
+    return np.bincount(np.concatenate(pair_indices), minlength=num_categories ** 2).reshape(num_categories,
+                                                                                             num_categories)
+
+
+class EntropyTracker:
+    # Keeps the category counts and the pair tables of a raster up to date, so an update only visits the
+    # neighbourhoods of the changed cells instead of the whole raster
+
+    def __init__(self, data_matrix, cell_size=1, critical_distance=1, categories=None):
+        _validate_data_matrix(data_matrix)
+        self.cell_size = _validate_cell_size(cell_size)
+        if critical_distance is not None:
+            _validate_critical_distance(critical_distance, self.cell_size, *data_matrix.shape)
+        self.critical_distance = critical_distance
+
+        self.categories, self._codes = _encode_tracked_categories(data_matrix, categories)
+        if len(self.categories) == 0:
+            raise ValueError("The data matrix has no categories to compute entropy.")
+        num_categories = len(self.categories)
+        self._changed = np.zeros(self._codes.shape, dtype=bool)
+
+        self.category_counts = np.bincount(self._codes[self._codes >= 0], minlength=num_categories)
+        self.oneill_pairs = _cooccurrence_tensor(self._codes, num_categories, ADJACENT_OFFSETS).sum(axis=0)
+        self._leibovici_offsets = np.empty((0, 2), dtype=int)
+        if critical_distance is not None:
+            self._leibovici_offsets = _offsets_within_distance(*self._codes.shape, self.cell_size, critical_distance)
+        self.leibovici_pairs = _cooccurrence_tensor(self._codes, num_categories, self._leibovici_offsets).sum(axis=0)
+
+    @property
+    def data_matrix(self):
+        return np.where(self._codes >= 0, self.categories[np.maximum(self._codes, 0)], np.nan)
+
+    def update(self, rows, cols, new_values):
+        rows, cols, new_values = _validate_changes(rows, cols, new_values, self._codes.shape)
+        rows, cols, new_values = _last_changes(rows, cols, new_values, self._codes.shape[1])
+
+        valid = ~np.isnan(new_values)
+        new_codes = np.full(len(new_values), -1, dtype=np.intp)
+        new_codes[valid] = np.searchsorted(self.categories, new_values[valid])
+        known = new_codes[valid] < len(self.categories)
+        known[known] = self.categories[new_codes[valid][known]] == new_values[valid][known]
+        if not known.all():
+            raise ValueError("The new values must be among the tracked categories, please pass all categories the "
+                             "raster can take when creating the tracker.")
+
+        num_categories = len(self.categories)
+        self._changed[rows, cols] = True
+        old_codes = self._codes[rows, cols]
+        self.oneill_pairs -= _changed_pairs(self._codes, self._changed, rows, cols, ADJACENT_OFFSETS, num_categories)
+        self.leibovici_pairs -= _changed_pairs(self._codes, self._changed, rows, cols, self._leibovici_offsets,
+                                               num_categories)
+        self._codes[rows, cols] = new_codes
+        self.oneill_pairs += _changed_pairs(self._codes, self._changed, rows, cols, ADJACENT_OFFSETS, num_categories)
+        self.leibovici_pairs += _changed_pairs(self._codes, self._changed, rows, cols, self._leibovici_offsets,
+                                               num_categories)
+        self._changed[rows, cols] = False
+
+        self.category_counts -= np.bincount(old_codes[old_codes >= 0], minlength=num_categories)
+        self.category_counts += np.bincount(new_codes[new_codes >= 0], minlength=num_categories)
+        return self.entropies()
+
+    def entropies(self):
+        present_categories = np.count_nonzero(self.category_counts)
+        shannon_entropy = _pair_entropy(self.category_counts[np.newaxis])[0]
+        oneill_entropy = _pair_entropy(self.oneill_pairs[np.newaxis])[0]
+        leibovici_entropy = _pair_entropy(self.leibovici_pairs[np.newaxis])[0]
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return TrackerResult(
+                shannon_entropy=shannon_entropy,
+                relative_shannon_entropy=shannon_entropy / np.log(present_categories) if present_categories > 1 else 0,
+                oneill_entropy=oneill_entropy,
+                relative_oneill_entropy=oneill_entropy / np.log(present_categories ** 2),
+                leibovici_entropy=leibovici_entropy,
+                relative_leibovici_entropy=leibovici_entropy / np.log(present_categories ** 2)
+            )
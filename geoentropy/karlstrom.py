@@ -1,15 +1,26 @@
 import numpy as np
 import pandas as pd
+from scipy import sparse
 from scipy.spatial import KDTree
-from .spatial_partition import spatial_partition
+from .plotting import _show_plot
+from .results import EntropyRange, KarlstromResult, _validate_detail
+from .point_events import _count_event_partitions
+from .spatial_partition import spatial_partition, _count_sparse_partitions
 
 
 def _validate_data_matrix(data_matrix):
-    if not isinstance(data_matrix, np.ndarray) or data_matrix.ndim != 2:
+    if not (isinstance(data_matrix, np.ndarray) or sparse.issparse(data_matrix)) or data_matrix.ndim != 2:
         raise ValueError("For grid data, please provide the dataset as a 2D matrix.")
 
 
+def _validate_input(data_matrix, events):
+    if (data_matrix is None) == (events is None):
+        raise ValueError("Please provide either a data matrix or event coordinates.")
+
+
 def _dichotomize_data_matrix(data_matrix, category):
+    if sparse.issparse(data_matrix):
+        return _dichotomize_sparse_data_matrix(data_matrix, category)
     data_vector = data_matrix.ravel()
     unique_values = np.unique(data_vector)
     if category not in unique_values:
@@ -17,13 +28,30 @@ def _dichotomize_data_matrix(data_matrix, category):
     return (data_vector == category).astype(int).reshape(data_matrix.shape)
 
 
-def _calculate_area_data(data_with_partitions, total_positive):
-    area_data = data_with_partitions.groupby('partition').agg(
-        abs_freq=pd.NamedAgg(column='category', aggfunc='sum'),
-        area_size=pd.NamedAgg(column='partition', aggfunc='count')
-    )
-    area_data['rel_freq'] = area_data['abs_freq'] / total_positive
-    return area_data.reset_index()
+def _dichotomize_sparse_data_matrix(data_matrix, category):
+    # The implicit background cannot be the category of interest, otherwise the result would be dense
+    if category == 0:
+        raise ValueError("For sparse matrices, please select a category other than the background 0.")
+    data_matrix = sparse.csr_matrix(data_matrix)
+    if category not in data_matrix.data:
+        raise ValueError("Please select a category among the ones in the dataset.")
+    return (data_matrix == category).astype(int)
+
+
+def _calculate_area_arrays(dichotomized_data_matrix, partition_indices):
+    area_sizes = np.bincount(partition_indices)
+    positive_counts = np.bincount(partition_indices[dichotomized_data_matrix.ravel() == 1], minlength=len(area_sizes))
+    partitions = np.flatnonzero(area_sizes)
+    return partitions, positive_counts[partitions], area_sizes[partitions]
+
+
+def _calculate_area_data(partitions, positive_counts, area_sizes, rel_freq):
+    return pd.DataFrame({
+        'partition': partitions,
+        'abs_freq': positive_counts,
+        'area_size': area_sizes,
+        'rel_freq': rel_freq
+    })
 
 
 def _determine_neighbors(centroids, tree, method, neighbors):
@@ -41,24 +69,28 @@ def _determine_neighbors(centroids, tree, method, neighbors):
     return indices
 
 
-def _compute_karlstrom_entropy(area_data, neighbor_indices):
+def _compute_karlstrom_entropy(partitions, rel_freq, neighbor_indices):
+    rel_freq_lookup = np.full(max(partitions.max(), len(neighbor_indices)) + 1, np.nan)
+    rel_freq_lookup[partitions] = rel_freq
     neighbor_means = []
     for idx in neighbor_indices:
+        neighbor_rel_freq = rel_freq_lookup[np.asarray(idx, dtype=int)]
+        neighbor_rel_freq = neighbor_rel_freq[~np.isnan(neighbor_rel_freq)]
         if len(idx) > 0:
-            neighbor_means.append(area_data.loc[area_data['partition'].isin(idx), 'rel_freq'].mean())
+            neighbor_means.append(neighbor_rel_freq.mean() if len(neighbor_rel_freq) > 0 else np.nan)
         else:
             neighbor_means.append(0)
     neighbor_means = np.array(neighbor_means)
     neighbor_means = np.where(neighbor_means == 0, np.nan, neighbor_means)
-    karl_terms = np.where(area_data['rel_freq'] > 0, area_data['rel_freq'] * np.log(1 / neighbor_means), 0)
+    karl_terms = np.where(rel_freq > 0, rel_freq * np.log(1 / neighbor_means), 0)
     karl_terms = np.nan_to_num(karl_terms)  # Convert NaNs to zero
     karl_entropy = np.sum(karl_terms)
     return karl_entropy
 
 
-def _calculate_karlstrom_entropy_range(area_data):
-    total_area = area_data['area_size'].sum()
-    min_area = area_data['area_size'].min()
+def _calculate_karlstrom_entropy_range(area_sizes):
+    total_area = area_sizes.sum()
+    min_area = area_sizes.min()
     return [max(0, np.log(min_area)), np.log(total_area)], total_area
 
 
@@ -67,28 +99,55 @@ def _apply_karlstrom_entropy_limit(karl_entropy, centroids):
     return min(karl_entropy, max_karl_entropy)
 
 
-def karlstrom(data_matrix, category=1, cell_size=1, partition=10, observation_window=None, neighbors=4, method="number",
-              plot_output=True):
-    _validate_data_matrix(data_matrix)
-    dichotomized_data_matrix = _dichotomize_data_matrix(data_matrix, category)
-    partition_result = spatial_partition(dichotomized_data_matrix, partitions=partition, cell_size=cell_size,
-                                         window=observation_window, plot_output=plot_output)
+def karlstrom(data_matrix=None, category=1, cell_size=1, partition=10, observation_window=None, neighbors=4,
+              method="number", plot_output=True, detail='full', events=None, weights=None):
+    _validate_input(data_matrix, events)
+    detail = _validate_detail(detail)
+    if events is not None:
+        centroids, partition_ids, positive_counts, area_sizes, plot_spec = _count_event_partitions(
+            events, weights, partition, observation_window, cell_size)
+        total_positive = positive_counts.sum()
+    else:
+        _validate_data_matrix(data_matrix)
+        dichotomized_data_matrix = _dichotomize_data_matrix(data_matrix, category)
+        total_positive = dichotomized_data_matrix.sum()
+        if sparse.issparse(dichotomized_data_matrix):
+            centroids, partition_ids, positive_counts, area_sizes, plot_spec = _count_sparse_partitions(
+                dichotomized_data_matrix, partition, cell_size, observation_window)
+        else:
+            partition_result = spatial_partition(dichotomized_data_matrix, partitions=partition, cell_size=cell_size,
+                                                 window=observation_window, plot_output=False, detail='arrays')
+            centroids, plot_spec = partition_result.partition_coordinates, partition_result.plot_spec
+            partition_ids, positive_counts, area_sizes = _calculate_area_arrays(dichotomized_data_matrix,
+                                                                                partition_result.partition_indices)
+    if plot_output:
+        _show_plot(plot_spec)
 
-    centroids = partition_result['partition_coordinates']
     tree = KDTree(centroids)
     neighbor_indices = _determine_neighbors(centroids, tree, method, neighbors)
+    rel_freq = positive_counts / total_positive
 
-    total_positive = np.sum(dichotomized_data_matrix)
-    area_data = _calculate_area_data(partition_result['data_with_partitions'], total_positive)
-
-    karl_entropy = _compute_karlstrom_entropy(area_data, neighbor_indices)
+    karl_entropy = _compute_karlstrom_entropy(partition_ids, rel_freq, neighbor_indices)
     karl_entropy = _apply_karlstrom_entropy_limit(karl_entropy, centroids)
-    karl_entropy_range, total_area = _calculate_karlstrom_entropy_range(area_data)
+    karl_entropy_range, total_area = _calculate_karlstrom_entropy_range(area_sizes)
+
+    if detail != 'full':
+        return KarlstromResult(
+            karlstrom_entropy=karl_entropy,
+            entropy_range=EntropyRange(*karl_entropy_range),
+            relative_karlstrom_entropy=karl_entropy / np.log(total_area),
+            partitions=partition_ids if detail == 'arrays' else None,
+            positive_counts=positive_counts if detail == 'arrays' else None,
+            area_sizes=area_sizes if detail == 'arrays' else None,
+            area_centroids=centroids if detail == 'arrays' else None,
+            plot_spec=plot_spec if detail == 'arrays' else None
+        )
 
     return {
         'karlstrom_entropy': karl_entropy,
         'entropy_range': {'minimum': karl_entropy_range[0], 'maximum': karl_entropy_range[1]},
         'relative_karlstrom_entropy': karl_entropy / np.log(total_area),
-        'area_data': area_data,
-        'area_centroids': partition_result['partition_coordinates']
+        'area_data': _calculate_area_data(partition_ids, positive_counts, area_sizes, rel_freq),
+        'area_centroids': centroids,
+        'plot_spec': plot_spec
     }
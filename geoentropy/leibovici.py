@@ -2,12 +2,19 @@ import numpy as np
 import pandas as pd
 from math import sqrt, log
 import matplotlib.pyplot as plt
+from scipy import sparse
 from shapely.geometry import Polygon
+from scipy.stats import norm
+from .cooccurrence import _cooccurrence_tensor, _encode_categories, _observed_pairs, _offsets_within_distance
+from .results import ConfidenceInterval, EntropyRange, LeiboviciResult, _validate_detail
+from .shannon import _calculate_entropy_variance
+
+SAMPLE_BATCH_SIZE = 2 ** 16
 
 
 def _validate_data_matrix(data_matrix):
-    if not isinstance(data_matrix, np.ndarray):
-        raise ValueError("For grid data, please provide the dataset as a numpy array.")
+    if not isinstance(data_matrix, np.ndarray) and not sparse.issparse(data_matrix):
+        raise ValueError("For grid data, please provide the dataset as a numpy array or a scipy.sparse matrix.")
     if data_matrix.ndim != 2:
         raise ValueError("The data matrix must be two-dimensional.")
 
@@ -27,41 +34,116 @@ def _validate_critical_distance(critical_distance, cell_size, num_rows, num_cols
             "The chosen distance is equal or larger than the maximum distance over the observation area. Maybe you wish to compute the non-spatial Shannon's entropy of Z instead?")
 
 
-def _count_adjacent_pairs_within_distance(data_matrix, cell_size, critical_distance):
+def _validate_method(method):
+    if method not in ('exact', 'sampled'):
+        raise ValueError("Method should be set to either 'exact' or 'sampled'.")
+    return method
+
+
+def _validate_sampling(tolerance, max_samples, confidence):
+    if tolerance <= 0:
+        raise ValueError("The tolerance must be a positive number.")
+    if not isinstance(max_samples, (int, np.integer)) or max_samples < 1:
+        raise ValueError("The maximum number of samples must be a positive integer.")
+    if not 0 < confidence < 1:
+        raise ValueError("The confidence level must be between 0 and 1.")
+
+
+def _sample_cell_values(data_matrix, rows, cols):
+    if sparse.issparse(data_matrix):
+        return np.asarray(data_matrix[rows, cols]).ravel()
+    return data_matrix[rows, cols]
+
+
+def _merge_categories(categories, pair_table, batch_categories):
+    # Categories only become known as they are drawn, so the pair table grows whenever a batch brings new ones
+    merged_categories = np.union1d(categories, batch_categories)
+    if len(merged_categories) == len(categories):
+        return categories, pair_table
+    merged_table = np.zeros((len(merged_categories), len(merged_categories)), dtype=np.int64)
+    positions = np.searchsorted(merged_categories, categories)
+    merged_table[np.ix_(positions, positions)] = pair_table
+    return merged_categories, merged_table
+
+
+def _sample_pairs_within_distance(data_matrix, offsets, tolerance, max_samples, confidence, seed):
+    # Offsets are drawn in proportion to the number of couples they form, so every couple within the distance is
+    # equally likely; sampling stops once the confidence interval is narrower than twice the tolerance. Only the
+    # drawn cells are read, so the cost does not depend on the size of the raster
     num_rows, num_cols = data_matrix.shape
-    data_pairs = []
-    for i in range(num_rows):
-        for j in range(num_cols):
-            if np.isnan(data_matrix[i, j]):
-                continue
-            for i2 in range(i, num_rows):
-                for j2 in range(num_cols):
-                    if i2 == i and j2 <= j:
-                        continue
-                    if np.isnan(data_matrix[i2, j2]):
-                        continue
-                    distance = sqrt((i2 - i) ** 2 * cell_size[0] ** 2 + (j2 - j) ** 2 * cell_size[1] ** 2)
-                    if distance <= critical_distance:
-                        data_pairs.append(f"{data_matrix[i, j]}-{data_matrix[i2, j2]}")
-    return data_pairs
-
-
-def _calculate_entropy(data_pairs):
-    if not data_pairs:
+    if sparse.issparse(data_matrix):
+        data_matrix = sparse.csr_matrix(data_matrix)
+    random_generator = np.random.default_rng(seed)
+    couples_per_offset = (num_rows - offsets[:, 0]) * (num_cols - np.abs(offsets[:, 1]))
+    offset_probabilities = couples_per_offset / couples_per_offset.sum()
+    z_score = norm.ppf(0.5 + confidence / 2)
+
+    categories = np.empty(0, dtype=data_matrix.dtype)
+    pair_table = np.zeros((0, 0), dtype=np.int64)
+    drawn = 0
+    half_width = np.inf
+    while drawn < max_samples and half_width > tolerance:
+        batch_size = min(SAMPLE_BATCH_SIZE, max_samples - drawn)
+        row_offsets, col_offsets = offsets[random_generator.choice(len(offsets), batch_size, p=offset_probabilities)].T
+        first_rows = random_generator.integers(0, num_rows - row_offsets)
+        first_cols = random_generator.integers(np.maximum(0, -col_offsets), num_cols - np.maximum(0, col_offsets))
+        first_values = _sample_cell_values(data_matrix, first_rows, first_cols)
+        second_values = _sample_cell_values(data_matrix, first_rows + row_offsets, first_cols + col_offsets)
+        valid = ~np.isnan(first_values) & ~np.isnan(second_values)
+        drawn += batch_size
+        if not valid.any():
+            continue
+
+        batch_categories, batch_codes = np.unique(np.concatenate((first_values[valid], second_values[valid])),
+                                                  return_inverse=True)
+        categories, pair_table = _merge_categories(categories, pair_table, batch_categories)
+        codes = np.searchsorted(categories, batch_categories)[batch_codes.ravel()]
+        num_categories = len(categories)
+        first_codes, second_codes = np.split(codes, 2)
+        pair_table += np.bincount(first_codes * num_categories + second_codes,
+                                  minlength=num_categories ** 2).reshape(num_categories, num_categories)
+
+        samples = pair_table.sum()
+        probabilities = pair_table[pair_table > 0] / samples
+        entropy_value = -np.sum(probabilities * np.log(probabilities))
+        half_width = z_score * np.sqrt(max(_calculate_entropy_variance(probabilities, entropy_value), 0) / samples)
+    return categories, pair_table, half_width
+
+
+def _count_pairs_within_distance(codes, num_categories, offsets):
+    return _observed_pairs(_cooccurrence_tensor(codes, num_categories, offsets).sum(axis=0))
+
+
+def _calculate_entropy(pair_counts):
+    if pair_counts.sum() == 0:
         raise ValueError("Insufficient data to compute source.")
-    pair_counts = pd.Series(data_pairs).value_counts()
     probabilities = pair_counts / pair_counts.sum()
-    entropy_value = -sum(p * log(p) for p in probabilities if p > 0)
-    return entropy_value, pair_counts, probabilities
+    entropy_value = -np.sum(probabilities * np.log(probabilities))
+    return entropy_value, probabilities
+
+
+def _determine_entropy_range(categories):
+    return [0, log(len(categories) ** 2)]
 
 
-def _determine_entropy_range(data_matrix):
-    num_categories = len(np.unique(data_matrix[~np.isnan(data_matrix)]))
-    return [0, log(num_categories ** 2)]
+def _build_probability_distribution(categories, pair_codes, pair_counts, probabilities):
+    order = np.argsort(-pair_counts, kind='stable')
+    return pd.DataFrame({
+        "pair": [f"{categories[first]}-{categories[second]}" for first, second in pair_codes[order]],
+        "absolute_frequency": pair_counts[order],
+        "relative_frequency": probabilities[order]
+    })
 
 
 def _plot_data_matrix(data_matrix):
-    plt.imshow(data_matrix, cmap='plasma', interpolation='nearest')
+    if sparse.issparse(data_matrix):
+        # Only the stored cells are drawn, the background stays empty
+        cells = sparse.coo_matrix(data_matrix)
+        plt.scatter(cells.col, cells.row, c=cells.data, cmap='plasma', marker='s', s=4)
+        plt.xlim(-0.5, data_matrix.shape[1] - 0.5)
+        plt.ylim(data_matrix.shape[0] - 0.5, -0.5)
+    else:
+        plt.imshow(data_matrix, cmap='plasma', interpolation='nearest')
     plt.colorbar()
     plt.title("Data Visualization")
     plt.xlabel('X Coordinate')
@@ -69,26 +151,55 @@ def _plot_data_matrix(data_matrix):
     plt.show()
 
 
-def leibovici(data_matrix, cell_size=1, critical_distance=1, plot_output=True):
+def leibovici(data_matrix, cell_size=1, critical_distance=1, plot_output=True, detail='full', method='exact',
+              tolerance=0.01, max_samples=10 ** 7, confidence=0.95, seed=None):
     _validate_data_matrix(data_matrix)
+    detail = _validate_detail(detail)
+    method = _validate_method(method)
+    if method == 'sampled':
+        _validate_sampling(tolerance, max_samples, confidence)
     num_rows, num_cols = data_matrix.shape
     cell_size = _validate_cell_size(cell_size)
     _validate_critical_distance(critical_distance, cell_size, num_rows, num_cols)
 
-    data_pairs = _count_adjacent_pairs_within_distance(data_matrix, cell_size, critical_distance)
-    entropy_value, pair_counts, probabilities = _calculate_entropy(data_pairs)
-    entropy_range = _determine_entropy_range(data_matrix)
-
-    results = {
-        "leibovici_entropy": entropy_value,
-        "entropy_range": {'minimum': entropy_range[0], 'maximum': entropy_range[1]},
-        "relative_leibovici_entropy": entropy_value / entropy_range[1],
-        "probability_distribution": pd.DataFrame({
-            "pair": pair_counts.index,
-            "absolute_frequency": pair_counts.values,
-            "relative_frequency": probabilities.values
-        })
-    }
+    offsets = _offsets_within_distance(num_rows, num_cols, cell_size, critical_distance)
+    confidence_interval = samples = None
+    if method == 'sampled':
+        categories, pair_table, half_width = _sample_pairs_within_distance(data_matrix, offsets, tolerance,
+                                                                           max_samples, confidence, seed)
+        pair_codes, pair_counts = _observed_pairs(pair_table)
+    else:
+        categories, codes = _encode_categories(data_matrix)
+        pair_codes, pair_counts = _count_pairs_within_distance(codes, len(categories), offsets)
+    entropy_value, probabilities = _calculate_entropy(pair_counts)
+    entropy_range = _determine_entropy_range(categories)
+    if method == 'sampled':
+        confidence_interval = ConfidenceInterval(max(entropy_value - half_width, entropy_range[0]),
+                                                 min(entropy_value + half_width, entropy_range[1]))
+        samples = int(pair_counts.sum())
+
+    if detail != 'full':
+        results = LeiboviciResult(
+            leibovici_entropy=entropy_value,
+            entropy_range=EntropyRange(*entropy_range),
+            relative_leibovici_entropy=entropy_value / entropy_range[1],
+            categories=categories if detail == 'arrays' else None,
+            pair_codes=pair_codes if detail == 'arrays' else None,
+            pair_counts=pair_counts if detail == 'arrays' else None,
+            confidence_interval=confidence_interval,
+            samples=samples
+        )
+    else:
+        results = {
+            "leibovici_entropy": entropy_value,
+            "entropy_range": {'minimum': entropy_range[0], 'maximum': entropy_range[1]},
+            "relative_leibovici_entropy": entropy_value / entropy_range[1],
+            "probability_distribution": _build_probability_distribution(categories, pair_codes, pair_counts,
+                                                                        probabilities)
+        }
+        if method == 'sampled':
+            results['confidence_interval'] = {'lower': confidence_interval.lower, 'upper': confidence_interval.upper}
+            results['samples'] = samples
 
     if plot_output:
         _plot_data_matrix(data_matrix)
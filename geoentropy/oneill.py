@@ -2,17 +2,28 @@ import numpy as np
 import pandas as pd
 from math import log
 import matplotlib.pyplot as plt
+from scipy import sparse
+from .cooccurrence import ADJACENT_OFFSETS, _cooccurrence_tensor, _encode_categories, _observed_pairs
+from .results import EntropyRange, OneillResult, _validate_detail
 
 
 def _validate_data_matrix(data_matrix):
-    if not isinstance(data_matrix, np.ndarray):
-        raise ValueError("This function works for grid data. Please provide the dataset as a numpy array.")
+    if not isinstance(data_matrix, np.ndarray) and not sparse.issparse(data_matrix):
+        raise ValueError(
+            "This function works for grid data. Please provide the dataset as a numpy array or a scipy.sparse matrix.")
     if data_matrix.ndim != 2:
         raise ValueError("The data matrix must be two-dimensional.")
 
 
 def _plot_data_matrix(data_matrix):
-    plt.imshow(data_matrix, origin='lower', cmap='plasma')
+    if sparse.issparse(data_matrix):
+        # Only the stored cells are drawn, the background stays empty
+        cells = sparse.coo_matrix(data_matrix)
+        plt.scatter(cells.col, cells.row, c=cells.data, cmap='plasma', marker='s', s=4)
+        plt.xlim(-0.5, data_matrix.shape[1] - 0.5)
+        plt.ylim(-0.5, data_matrix.shape[0] - 0.5)
+    else:
+        plt.imshow(data_matrix, origin='lower', cmap='plasma')
     plt.colorbar()
     plt.title('Data Visualization')
     plt.xlabel('X Coordinate')
@@ -20,62 +31,64 @@ def _plot_data_matrix(data_matrix):
     plt.show()
 
 
-def _collect_adjacent_pairs(data_matrix):
-    num_rows, num_cols = data_matrix.shape
-    data_pairs = []
+def _collect_adjacent_pairs(codes, num_categories):
+    # Vertically and horizontally adjacent cells, each pair in reading direction
+    pair_table = _cooccurrence_tensor(codes, num_categories, ADJACENT_OFFSETS).sum(axis=0)
 
-    # Collect horizontal adjacent pairs
-    for i in range(num_rows - 1):
-        for j in range(num_cols):
-            if not np.isnan(data_matrix[i, j]) and not np.isnan(data_matrix[i + 1, j]):
-                data_pairs.append(f"{data_matrix[i, j]}-{data_matrix[i + 1, j]}")
-
-    # Collect vertical adjacent pairs
-    for i in range(num_rows):
-        for j in range(num_cols - 1):
-            if not np.isnan(data_matrix[i, j]) and not np.isnan(data_matrix[i, j + 1]):
-                data_pairs.append(f"{data_matrix[i, j]}-{data_matrix[i, j + 1]}")
-
-    if not data_pairs:
+    if pair_table.sum() == 0:
         raise ValueError("Insufficient data to compute source.")
 
-    return data_pairs
+    return _observed_pairs(pair_table)
 
 
-def _calculate_entropy(data_pairs):
-    pair_counts = pd.Series(data_pairs).value_counts()
+def _calculate_entropy(pair_counts):
     probabilities = pair_counts / pair_counts.sum()
-    entropy_value = -sum(prob * log(prob) for prob in probabilities if prob > 0)
-    return entropy_value, pair_counts, probabilities
+    entropy_value = -np.sum(probabilities * np.log(probabilities))
+    return entropy_value, probabilities
 
 
 def _calculate_entropy_range(unique_elements):
     return [0, log(len(unique_elements) ** 2)]
 
 
-def oneill(data_matrix, plot_output=False):
+def _build_probability_distribution(categories, pair_codes, pair_counts, probabilities):
+    order = np.argsort(-pair_counts, kind='stable')
+    return pd.DataFrame({
+        'pair': [f"{categories[first]}-{categories[second]}" for first, second in pair_codes[order]],
+        'absolute_frequency': pair_counts[order],
+        'relative_frequency': probabilities[order]
+    })
+
+
+def oneill(data_matrix, plot_output=False, detail='full'):
     _validate_data_matrix(data_matrix)
+    detail = _validate_detail(detail)
     if plot_output:
         _plot_data_matrix(data_matrix)
 
-    unique_elements = np.unique(data_matrix[~np.isnan(data_matrix)])
+    unique_elements, codes = _encode_categories(data_matrix)
     if len(unique_elements) == 1:
         raise ValueError("Data matrix must have at least two categories to compute source.")
 
-    data_pairs = _collect_adjacent_pairs(data_matrix)
-    entropy_value, pair_counts, probabilities = _calculate_entropy(data_pairs)
+    pair_codes, pair_counts = _collect_adjacent_pairs(codes, len(unique_elements))
+    entropy_value, probabilities = _calculate_entropy(pair_counts)
     entropy_range = _calculate_entropy_range(unique_elements)
 
-    # Return the entropy measures and details
-    probability_distribution = pd.DataFrame({
-        'pair': pair_counts.index,
-        'absolute_frequency': pair_counts.values,
-        'relative_frequency': probabilities.values
-    })
+    if detail != 'full':
+        return OneillResult(
+            oneill_entropy=entropy_value,
+            entropy_range=EntropyRange(*entropy_range),
+            relative_oneill_entropy=entropy_value / entropy_range[1],
+            categories=unique_elements if detail == 'arrays' else None,
+            pair_codes=pair_codes if detail == 'arrays' else None,
+            pair_counts=pair_counts if detail == 'arrays' else None
+        )
 
+    # Return the entropy measures and details
     return {
         'oneill_entropy': entropy_value,
         'entropy_range': {'minimum': entropy_range[0], 'maximum': entropy_range[1]},
         'relative_oneill_entropy': entropy_value / entropy_range[1],
-        'probability_distribution': probability_distribution
+        'probability_distribution': _build_probability_distribution(unique_elements, pair_codes, pair_counts,
+                                                                    probabilities)
     }
@@ -0,0 +1,100 @@
+import matplotlib.pyplot as plt
+from concurrent.futures import ThreadPoolExecutor
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from scipy import sparse
+from scipy.spatial import Voronoi, voronoi_plot_2d
+from shapely.geometry import MultiPoint, box
+from shapely.ops import voronoi_diagram
+from .results import PartitionPlotSpec
+
+FIGURE_SIZE = (8, 8)
+
+
+def _validate_plot_spec(plot_spec):
+    if not isinstance(plot_spec, PartitionPlotSpec):
+        raise ValueError("Please provide a plot spec as returned in the 'plot_spec' of a result.")
+    if plot_spec.kind not in ('voronoi', 'blocks', 'events'):
+        raise ValueError("The kind of the plot spec should be either 'voronoi', 'blocks' or 'events'.")
+
+
+def _draw_matrix(figure, axes, data_matrix, extent):
+    min_x, max_x, min_y, max_y = extent
+    if sparse.issparse(data_matrix):
+        # Only the stored cells are drawn, the background stays empty
+        cells = sparse.coo_matrix(data_matrix)
+        x_cell_size = (max_x - min_x) / data_matrix.shape[1]
+        y_cell_size = (max_y - min_y) / data_matrix.shape[0]
+        image = axes.scatter(min_x + (cells.col + 0.5) * x_cell_size, min_y + (cells.row + 0.5) * y_cell_size,
+                             c=cells.data, cmap='tab20c', marker='s', s=4)
+        axes.set_xlim(min_x, max_x)
+        axes.set_ylim(min_y, max_y)
+    else:
+        image = axes.imshow(data_matrix, extent=extent, cmap='tab20c', origin='lower', aspect='equal')
+    figure.colorbar(image, ax=axes, label='Data values')
+
+
+def _draw_voronoi_partition(figure, axes, plot_spec):
+    _draw_matrix(figure, axes, plot_spec.data, plot_spec.extent)
+    vor = Voronoi(plot_spec.partition_coordinates)
+    voronoi_plot_2d(vor, show_vertices=False, line_colors='black', line_width=2, line_alpha=0.6, point_size=2,
+                    ax=axes)
+    axes.set_title('Voronoi Partitioning Overlaid on Data Heatmap')
+    axes.invert_yaxis()
+
+
+def _draw_block_partition(figure, axes, plot_spec):
+    _draw_matrix(figure, axes, plot_spec.data, plot_spec.extent)
+    for row_edge in plot_spec.row_edges:
+        axes.axhline(row_edge, color='black', linewidth=2, alpha=0.6)
+    for col_edge in plot_spec.col_edges:
+        axes.axvline(col_edge, color='black', linewidth=2, alpha=0.6)
+    axes.set_title('Block Partitioning Overlaid on Data Heatmap')
+
+
+def _draw_event_partition(figure, axes, plot_spec):
+    min_x, max_x, min_y, max_y = plot_spec.extent
+    observation_window = box(min_x, min_y, max_x, max_y)
+    image = axes.scatter(plot_spec.data[:, 0], plot_spec.data[:, 1], c=plot_spec.weights, cmap='viridis', s=6)
+    figure.colorbar(image, ax=axes, label='Event weights')
+    for cell in voronoi_diagram(MultiPoint(plot_spec.partition_coordinates), envelope=observation_window).geoms:
+        axes.plot(*cell.intersection(observation_window).exterior.xy, color='black', linewidth=2, alpha=0.6)
+    axes.scatter(plot_spec.partition_coordinates[:, 0], plot_spec.partition_coordinates[:, 1], color='black', s=4)
+    axes.set_xlim(min_x, max_x)
+    axes.set_ylim(min_y, max_y)
+    axes.set_title('Voronoi Partitioning Overlaid on Events')
+
+
+def _draw_partition(figure, plot_spec):
+    axes = figure.add_subplot()
+    if plot_spec.kind == 'voronoi':
+        _draw_voronoi_partition(figure, axes, plot_spec)
+    elif plot_spec.kind == 'blocks':
+        _draw_block_partition(figure, axes, plot_spec)
+    else:
+        _draw_event_partition(figure, axes, plot_spec)
+    axes.grid(False)
+
+
+def _show_plot(plot_spec):
+    _validate_plot_spec(plot_spec)
+    _draw_partition(plt.figure(figsize=FIGURE_SIZE), plot_spec)
+    plt.show()
+
+
+def render_plot(plot_spec, output_path, dpi=100):
+    # A figure of its own on an Agg canvas, without pyplot, so that plots can be rendered from several threads
+    _validate_plot_spec(plot_spec)
+    figure = Figure(figsize=FIGURE_SIZE)
+    FigureCanvasAgg(figure)
+    _draw_partition(figure, plot_spec)
+    figure.savefig(output_path, format='png', dpi=dpi)
+    return output_path
+
+
+def render_plots(plot_specs, output_paths, workers=None, dpi=100):
+    plot_specs, output_paths = list(plot_specs), list(output_paths)
+    if len(plot_specs) != len(output_paths):
+        raise ValueError("Please provide one output path per plot spec.")
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(render_plot, plot_specs, output_paths, [dpi] * len(plot_specs)))
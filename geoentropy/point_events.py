@@ -0,0 +1,63 @@
+import numpy as np
+from scipy.spatial import KDTree
+from .results import PartitionPlotSpec
+from .spatial_partition import _generate_partition_coordinates, _voronoi_areas
+
+
+def _validate_events(events, weights):
+    events = np.asarray(events, dtype=float)
+    if events.ndim != 2 or events.shape[1] != 2 or len(events) == 0:
+        raise ValueError("Please provide the events as an array of (x, y) coordinates with one row per event.")
+    if weights is None:
+        return events, np.ones(len(events))
+    weights = np.asarray(weights, dtype=float)
+    if weights.shape != (len(events),):
+        raise ValueError("Please provide one weight per event.")
+    if np.any(weights < 0) or weights.sum() == 0:
+        raise ValueError("The weights must be non-negative and not all zero.")
+    return events, weights
+
+
+def _event_cell_area(cell_size):
+    if isinstance(cell_size, (int, float)):
+        x_cell_size = y_cell_size = cell_size
+    else:
+        x_cell_size, y_cell_size = cell_size
+    if x_cell_size <= 0 or y_cell_size <= 0:
+        raise ValueError("The cell size must be positive.")
+    return x_cell_size * y_cell_size
+
+
+def _event_window(events, window):
+    if window is None:
+        min_x, min_y = events.min(axis=0)
+        max_x, max_y = events.max(axis=0)
+    else:
+        min_x, min_y, max_x, max_y = window
+        if np.any(events[:, 0] < min_x) or np.any(events[:, 0] > max_x) or \
+                np.any(events[:, 1] < min_y) or np.any(events[:, 1] > max_y):
+            raise ValueError("There are events outside the boundaries of the observation window.")
+    if min_x >= max_x or min_y >= max_y:
+        raise ValueError("The observation window must have a positive width and height.")
+    return min_x, min_y, max_x, max_y
+
+
+def _count_event_partitions(events, weights, partitions, window, cell_size=1):
+    # Same output as _count_sparse_partitions, the areas are measured in cells of cell_size so that their logarithms
+    # do not depend on the unit of the coordinates
+    events, weights = _validate_events(events, weights)
+    cell_area = _event_cell_area(cell_size)
+    min_x, min_y, max_x, max_y = _event_window(events, window)
+    partition_coordinates = _generate_partition_coordinates(partitions, min_x, max_x, min_y, max_y)
+
+    _, event_partitions = KDTree(partition_coordinates).query(events)
+    positive_counts = np.bincount(event_partitions, weights=weights, minlength=len(partition_coordinates))
+    area_sizes = _voronoi_areas(partition_coordinates, (min_x, min_y, max_x, max_y)) / cell_area
+    if area_sizes.sum() <= 1:
+        raise ValueError("The observation window must cover more than one cell, please pass a smaller cell size.")
+    plot_spec = PartitionPlotSpec('events', events, (min_x, max_x, min_y, max_y), partition_coordinates,
+                                  weights=weights)
+
+    partition_ids = np.flatnonzero(area_sizes)
+    return (partition_coordinates, partition_ids + 1, positive_counts[partition_ids], area_sizes[partition_ids],
+            plot_spec)
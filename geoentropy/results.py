@@ -0,0 +1,138 @@
+from typing import NamedTuple, Optional
+
+import numpy as np
+
+DETAIL_LEVELS = ('summary', 'arrays', 'full')
+
+
+def _validate_detail(detail):
+    if detail not in DETAIL_LEVELS:
+        raise ValueError("Detail should be set to either 'summary', 'arrays' or 'full'.")
+    return detail
+
+
+class EntropyRange(NamedTuple):
+    minimum: float
+    maximum: float
+
+
+class ConfidenceInterval(NamedTuple):
+    lower: float
+    upper: float
+
+
+class PartitionPlotSpec(NamedTuple):
+    kind: str
+    data: object
+    extent: tuple
+    partition_coordinates: Optional[np.ndarray] = None
+    row_edges: Optional[np.ndarray] = None
+    col_edges: Optional[np.ndarray] = None
+    weights: Optional[np.ndarray] = None
+
+
+class PartitionResult(NamedTuple):
+    partition_coordinates: np.ndarray
+    partition_indices: np.ndarray
+    plot_spec: Optional[PartitionPlotSpec] = None
+
+
+class ShannonResult(NamedTuple):
+    shannon_entropy: float
+    shannon_entropy_range: EntropyRange
+    relative_shannon_entropy: float
+    variance: float
+    categories: Optional[np.ndarray] = None
+    counts: Optional[np.ndarray] = None
+
+
+class ShannonZResult(NamedTuple):
+    shannon_entropy_z: float
+    shannon_entropy_z_range: EntropyRange
+    relative_entropy_z: float
+    variance: float
+    categories: Optional[np.ndarray] = None
+    pair_codes: Optional[np.ndarray] = None
+    pair_counts: Optional[np.ndarray] = None
+
+
+class OneillResult(NamedTuple):
+    oneill_entropy: float
+    entropy_range: EntropyRange
+    relative_oneill_entropy: float
+    categories: Optional[np.ndarray] = None
+    pair_codes: Optional[np.ndarray] = None
+    pair_counts: Optional[np.ndarray] = None
+
+
+class LeiboviciResult(NamedTuple):
+    leibovici_entropy: float
+    entropy_range: EntropyRange
+    relative_leibovici_entropy: float
+    categories: Optional[np.ndarray] = None
+    pair_codes: Optional[np.ndarray] = None
+    pair_counts: Optional[np.ndarray] = None
+    confidence_interval: Optional[ConfidenceInterval] = None
+    samples: Optional[int] = None
+
+
+class BattyResult(NamedTuple):
+    batty_entropy: float
+    entropy_range: EntropyRange
+    relative_batty_entropy: float
+    partitions: Optional[np.ndarray] = None
+    positive_counts: Optional[np.ndarray] = None
+    area_sizes: Optional[np.ndarray] = None
+    partition_coordinates: Optional[np.ndarray] = None
+    plot_spec: Optional[PartitionPlotSpec] = None
+
+
+class KarlstromResult(NamedTuple):
+    karlstrom_entropy: float
+    entropy_range: EntropyRange
+    relative_karlstrom_entropy: float
+    partitions: Optional[np.ndarray] = None
+    positive_counts: Optional[np.ndarray] = None
+    area_sizes: Optional[np.ndarray] = None
+    area_centroids: Optional[np.ndarray] = None
+    plot_spec: Optional[PartitionPlotSpec] = None
+
+
+class BattyProfileResult(NamedTuple):
+    levels: np.ndarray
+    row_blocks: np.ndarray
+    col_blocks: np.ndarray
+    batty_entropy: np.ndarray
+    relative_batty_entropy: np.ndarray
+    positive_counts: Optional[tuple] = None
+
+
+class CooccurrenceResult(NamedTuple):
+    oneill_entropy: float
+    leibovici_entropy: float
+    sector_centers: np.ndarray
+    sector_entropy: np.ndarray
+    distances: np.ndarray
+    distance_entropy: np.ndarray
+    categories: Optional[np.ndarray] = None
+    offsets: Optional[np.ndarray] = None
+    tensor: Optional[np.ndarray] = None
+
+
+class PyramidResult(NamedTuple):
+    levels: np.ndarray
+    shapes: np.ndarray
+    shannon_entropy: np.ndarray
+    oneill_entropy: np.ndarray
+    leibovici_entropy: np.ndarray
+    categories: Optional[np.ndarray] = None
+    codes: Optional[tuple] = None
+
+
+class TrackerResult(NamedTuple):
+    shannon_entropy: float
+    relative_shannon_entropy: float
+    oneill_entropy: float
+    relative_oneill_entropy: float
+    leibovici_entropy: float
+    relative_leibovici_entropy: float
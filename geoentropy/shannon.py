@@ -1,21 +1,51 @@
 import numpy as np
-from math import comb, log
-from collections import Counter
+from math import log
+from scipy import sparse
+from .cooccurrence import BACKGROUND, _sparse_cells
+from .results import EntropyRange, ShannonResult, _validate_detail
 
 
 def _validate_data_matrix(data_matrix):
-    if not isinstance(data_matrix, np.ndarray):
-        raise ValueError("Input data must be a numpy array.")
-    if data_matrix.size == 0:
+    if not isinstance(data_matrix, np.ndarray) and not sparse.issparse(data_matrix):
+        raise ValueError("Input data must be a numpy array or a scipy.sparse matrix.")
+    if np.prod(data_matrix.shape) == 0:
         raise ValueError("The data matrix has no elements.")
     return data_matrix
 
 
-def _calculate_category_probabilities(category_counts):
-    total_elements = sum(category_counts.values())
+def _count_sparse_categories(data_matrix):
+    # The background count follows from the grid size, only the stored cells are counted
+    num_rows, num_cols = data_matrix.shape
+    rows, cols, values = _sparse_cells(data_matrix)
+    keys = rows * num_cols + cols
+    order = np.argsort(keys)
+    keys, values = keys[order], values[order]
+    categories, first_positions, counts = np.unique(values, return_index=True, return_counts=True)
+    first_indices = keys[first_positions]
+
+    background_count = num_rows * num_cols - len(values)
+    if background_count > 0:
+        gaps = np.flatnonzero(keys != np.arange(len(keys)))
+        categories = np.append(categories, np.array(BACKGROUND, dtype=categories.dtype))
+        counts = np.append(counts, background_count)
+        first_indices = np.append(first_indices, gaps[0] if len(gaps) > 0 else len(keys))
+    return categories, first_indices, counts
+
+
+def _count_categories(data_matrix):
+    if sparse.issparse(data_matrix):
+        categories, first_indices, counts = _count_sparse_categories(data_matrix)
+    else:
+        categories, first_indices, counts = np.unique(data_matrix.ravel(), return_index=True, return_counts=True)
+    order = np.argsort(first_indices, kind='stable')
+    return categories[order], counts[order]
+
+
+def _calculate_category_probabilities(counts):
+    total_elements = counts.sum()
     if total_elements == 0:
         raise ValueError("The data matrix has no elements.")
-    return np.array([count / total_elements for count in category_counts.values()])
+    return counts / total_elements
 
 
 def _calculate_shannon_entropy(probabilities):
@@ -27,30 +57,40 @@ def _calculate_shannon_entropy(probabilities):
 def _calculate_entropy_variance(probabilities, entropy_value):
     if probabilities.size == 0:
         return 0
-    squared_log_probabilities = [log(1 / prob) ** 2 for prob in probabilities]
-    return sum(prob * sq_log for prob, sq_log in zip(probabilities, squared_log_probabilities)) - entropy_value ** 2
+    return np.sum(probabilities * np.log(1 / probabilities) ** 2) - entropy_value ** 2
 
 
-def shannon(data_matrix):
+def shannon(data_matrix, detail='full'):
     data_matrix = _validate_data_matrix(data_matrix)
-    flattened_data = data_matrix.flatten()
-    category_counts = Counter(flattened_data)
-    probabilities = _calculate_category_probabilities(category_counts)
+    detail = _validate_detail(detail)
+    categories, counts = _count_categories(data_matrix)
+    probabilities = _calculate_category_probabilities(counts)
     entropy_value = _calculate_shannon_entropy(probabilities)
     variance = _calculate_entropy_variance(probabilities, entropy_value)
 
+    entropy_range = [0, log(len(categories))]
+    relative_entropy = entropy_value / entropy_range[1] if len(categories) > 1 else 0
+
+    if detail != 'full':
+        return ShannonResult(
+            shannon_entropy=entropy_value,
+            shannon_entropy_range=EntropyRange(*entropy_range),
+            relative_shannon_entropy=relative_entropy,
+            variance=variance,
+            categories=categories if detail == 'arrays' else None,
+            counts=counts if detail == 'arrays' else None
+        )
+
+    total_elements = int(counts.sum())
     probability_distribution = [
-        {'category': category, 'absolute_frequency': int(count),
-         'relative_frequency': count / sum(category_counts.values())}
-        for category, count in category_counts.items()
+        {'category': category, 'absolute_frequency': int(count), 'relative_frequency': int(count) / total_elements}
+        for category, count in zip(categories, counts)
     ]
-    entropy_range = [0, log(len(probability_distribution))]
 
     return {
         'shannon_entropy': entropy_value,
         'shannon_entropy_range': {'minimum': entropy_range[0], 'maximum': entropy_range[1]},
-        'relative_shannon_entropy': entropy_value / log(len(probability_distribution)) if len(
-            probability_distribution) > 1 else 0,
+        'relative_shannon_entropy': relative_entropy,
         'probability_distribution': probability_distribution,
         'variance': variance
     }
@@ -1,7 +1,6 @@
 import numpy as np
 from math import comb, log
-from collections import Counter
-from itertools import combinations_with_replacement
+from .results import EntropyRange, ShannonZResult, _validate_detail
 
 
 def _validate_data_matrix(data_matrix):
@@ -12,61 +11,88 @@ def _validate_data_matrix(data_matrix):
     return data_matrix
 
 
-def _calculate_category_probabilities(category_counts):
-    total_elements = sum(category_counts.values())
-    if total_elements == 0:
-        raise ValueError("The matrix has no elements.")
-    return np.array([count / total_elements for count in category_counts.values()])
-
+def _count_categories(data_matrix):
+    categories, first_indices, counts = np.unique(data_matrix.ravel(), return_index=True, return_counts=True)
+    order = np.argsort(first_indices, kind='stable')
+    return categories[order], counts[order]
 
-def _calculate_entropy(probabilities):
-    if probabilities.size == 0:
-        return 0
-    return -np.sum(probabilities * np.log(probabilities))
 
+def _calculate_pair_frequencies(counts):
+    # Upper triangle of the outer product, with n * (n - 1) / 2 pairs of the same category on the diagonal
+    counts = counts.astype(np.int64)
+    first_codes, second_codes = np.triu_indices(len(counts))
+    pair_absolute_frequencies = counts[first_codes] * counts[second_codes]
+    same_category = first_codes == second_codes
+    pair_absolute_frequencies[same_category] = counts * (counts - 1) // 2
+    return np.column_stack((first_codes, second_codes)), pair_absolute_frequencies
 
-def _calculate_entropy_variance(probabilities, entropy_value):
-    if probabilities.size == 0:
-        return 0
-    squared_log_probabilities = [log(1 / prob) ** 2 for prob in probabilities]
-    return sum(prob * sq_log for prob, sq_log in zip(probabilities, squared_log_probabilities)) - entropy_value ** 2
 
+def _calculate_pair_entropy(counts):
+    # Entropy and variance of the pair distribution in O(K): the pairs of different categories i < j have
+    # n_i * n_j * log(n_i * n_j) = n_i * n_j * (log n_i + log n_j), so their sums only need sums over the categories
+    counts = counts.astype(float)
+    total_count = counts.sum()
+    total_pairs = total_count * (total_count - 1) / 2
+    if total_pairs == 0:
+        raise ValueError("Sum of pair frequencies is zero, cannot divide by zero")
 
-def _calculate_pair_frequencies(category_counts, categories):
-    pair_absolute_frequencies = []
-    for category1, category2 in combinations_with_replacement(categories, 2):
-        count1 = category_counts[category1]
-        count2 = category_counts[category2]
-        freq = comb(count1, 2) if category1 == category2 else count1 * count2
-        pair_absolute_frequencies.append(freq)
-    return np.array(pair_absolute_frequencies)
+    same_pairs = counts * (counts - 1) / 2
+    with np.errstate(divide='ignore'):
+        log_same_pairs = np.where(same_pairs > 0, np.log(same_pairs), 0)
+    log_counts = np.log(counts)
+    weighted_logs = counts * log_counts
+    other_counts = total_count - counts
 
+    # Sums of c * log(c) and c * log(c) ** 2 over all pair frequencies c
+    log_sum = np.sum(same_pairs * log_same_pairs) + np.sum(weighted_logs * other_counts)
+    squared_log_sum = np.sum(same_pairs * log_same_pairs ** 2) + np.sum(weighted_logs * log_counts * other_counts) + \
+        weighted_logs.sum() ** 2 - np.sum(weighted_logs ** 2)
 
-def shannon_z(data_matrix):
-    data_matrix = _validate_data_matrix(data_matrix)
-    flattened_data = data_matrix.flatten()
-    category_counts = Counter(flattened_data)
-    categories = list(category_counts.keys())
+    log_total_pairs = np.log(total_pairs)
+    entropy_value = log_total_pairs - log_sum / total_pairs
+    squared_log_mean = (squared_log_sum - 2 * log_total_pairs * log_sum) / total_pairs + log_total_pairs ** 2
+    return entropy_value, squared_log_mean - entropy_value ** 2
 
-    pair_absolute_frequencies = _calculate_pair_frequencies(category_counts, categories)
-    total_pairs = pair_absolute_frequencies.sum()
-    if total_pairs == 0:
-        raise ValueError("Sum of pair frequencies is zero, cannot divide by zero")
 
-    pair_relative_frequencies = pair_absolute_frequencies / total_pairs
-    entropy_z_value = _calculate_entropy(pair_relative_frequencies)
-    variance = _calculate_entropy_variance(pair_relative_frequencies, entropy_z_value)
+def shannon_z(data_matrix, detail='full'):
+    data_matrix = _validate_data_matrix(data_matrix)
+    detail = _validate_detail(detail)
+    categories, counts = _count_categories(data_matrix)
+    entropy_z_value, variance = _calculate_pair_entropy(counts)
 
     entropy_z_range = [0, log(comb(len(categories) + 1, 2))]
-    pair_probabilities = [{'pair': f"{category1}-{category2}", 'absolute_frequency': int(af), 'relative_frequency': rf}
-                          for (category1, category2), af, rf in
-                          zip(combinations_with_replacement(categories, 2), pair_absolute_frequencies,
-                              pair_relative_frequencies)]
+    relative_entropy_z = entropy_z_value / entropy_z_range[1] if len(categories) > 1 else 0
+
+    if detail == 'summary':
+        return ShannonZResult(
+            shannon_entropy_z=entropy_z_value,
+            shannon_entropy_z_range=EntropyRange(*entropy_z_range),
+            relative_entropy_z=relative_entropy_z,
+            variance=variance
+        )
+
+    pair_codes, pair_absolute_frequencies = _calculate_pair_frequencies(counts)
+    if detail == 'arrays':
+        return ShannonZResult(
+            shannon_entropy_z=entropy_z_value,
+            shannon_entropy_z_range=EntropyRange(*entropy_z_range),
+            relative_entropy_z=relative_entropy_z,
+            variance=variance,
+            categories=categories,
+            pair_codes=pair_codes,
+            pair_counts=pair_absolute_frequencies
+        )
+
+    pair_relative_frequencies = pair_absolute_frequencies / pair_absolute_frequencies.sum()
+    pair_probabilities = [{'pair': f"{categories[code1]}-{categories[code2]}", 'absolute_frequency': int(af),
+                           'relative_frequency': rf}
+                          for (code1, code2), af, rf in
+                          zip(pair_codes, pair_absolute_frequencies, pair_relative_frequencies)]
 
     return {
         'shannon_entropy_z': entropy_z_value,
         'shannon_entropy_z_range': {'minimum': entropy_z_range[0], 'maximum': entropy_z_range[1]},
-        'relative_entropy_z': entropy_z_value / log(comb(len(categories) + 1, 2)) if len(categories) > 1 else 0,
+        'relative_entropy_z': relative_entropy_z,
         'variance': variance,
         'pair_probabilities': pair_probabilities
     }
@@ -1,11 +1,16 @@
 import numpy as np
 import pandas as pd
-from scipy.spatial import KDTree, Voronoi, voronoi_plot_2d
-import matplotlib.pyplot as plt
+from functools import lru_cache
+from scipy.spatial import KDTree
+from scipy import sparse
+from shapely.geometry import MultiPoint, box
+from shapely.ops import voronoi_diagram
+from .plotting import _show_plot
+from .results import PartitionPlotSpec, PartitionResult, _validate_detail
 
 
 def _validate_data_matrix(data_matrix):
-    if not isinstance(data_matrix, np.ndarray) or data_matrix.ndim != 2:
+    if not (isinstance(data_matrix, np.ndarray) or sparse.issparse(data_matrix)) or data_matrix.ndim != 2:
         raise ValueError("Please provide the dataset as a 2D matrix.")
 
 
@@ -25,13 +30,25 @@ def _initialize_parameters(data_matrix, cell_size, window):
     return num_rows, num_cols, x_cell_size, y_cell_size, min_x, min_y, max_x, max_y
 
 
-def _generate_grid_coordinates(num_rows, num_cols, x_cell_size, y_cell_size, min_x, min_y, max_x, max_y):
+def _generate_axis_coordinates(num_rows, num_cols, x_cell_size, y_cell_size, min_x, min_y, max_x, max_y):
     x_coordinates = np.linspace(min_x + x_cell_size / 2, max_x - x_cell_size / 2, num_cols)
     y_coordinates = np.linspace(min_y + y_cell_size / 2, max_y - y_cell_size / 2, num_rows)
+    return x_coordinates, y_coordinates
+
+
+def _generate_grid_coordinates(num_rows, num_cols, x_cell_size, y_cell_size, min_x, min_y, max_x, max_y):
+    x_coordinates, y_coordinates = _generate_axis_coordinates(num_rows, num_cols, x_cell_size, y_cell_size, min_x,
+                                                              min_y, max_x, max_y)
     grid_coordinates = np.array(np.meshgrid(x_coordinates, y_coordinates)).T.reshape(-1, 2)
     return grid_coordinates
 
 
+def _cell_coordinates(flat_indices, x_coordinates, y_coordinates):
+    # Same pairing of flat cell index and coordinates as _generate_grid_coordinates
+    return np.column_stack((x_coordinates[flat_indices // len(y_coordinates)],
+                            y_coordinates[flat_indices % len(y_coordinates)]))
+
+
 def _generate_partition_coordinates(partitions, min_x, max_x, min_y, max_y):
     if isinstance(partitions, int):
         random_x = np.random.uniform(min_x, max_x, partitions)
@@ -52,6 +69,30 @@ def _assign_partitions_to_grid(grid_coordinates, partition_coordinates):
     return nearest_partition_indices
 
 
+@lru_cache(maxsize=32)
+def _cached_voronoi_areas(coordinate_bytes, num_partitions, window):
+    # Every clipped cell contains only points closest to its own center, so any point inside it finds the center
+    partition_coordinates = np.frombuffer(coordinate_bytes).reshape(num_partitions, 2)
+    observation_window = box(*window)
+    cells = voronoi_diagram(MultiPoint(partition_coordinates), envelope=observation_window)
+    area_sizes = np.zeros(num_partitions)
+    tree = KDTree(partition_coordinates)
+    for cell in cells.geoms:
+        clipped_cell = cell.intersection(observation_window)
+        if not clipped_cell.is_empty:
+            _, partition_index = tree.query(np.array(clipped_cell.representative_point().coords[0]))
+            area_sizes[partition_index] += clipped_cell.area
+    area_sizes.flags.writeable = False
+    return area_sizes
+
+
+def _voronoi_areas(partition_coordinates, window):
+    # Cached per set of centers, so repeated calls with fixed centers only have to assign the events or cells
+    partition_coordinates = np.ascontiguousarray(partition_coordinates, dtype=float)
+    return _cached_voronoi_areas(partition_coordinates.tobytes(), len(partition_coordinates),
+                                 tuple(float(bound) for bound in window))
+
+
 def _create_data_frame(grid_coordinates, data_matrix, nearest_partition_indices):
     data_flattened = data_matrix.ravel()
     data_with_partitions = pd.DataFrame({
@@ -63,33 +104,55 @@ def _create_data_frame(grid_coordinates, data_matrix, nearest_partition_indices)
     return data_with_partitions
 
 
-def _plot_partitioned_data(data_matrix, min_x, max_x, min_y, max_y, partition_coordinates):
-    plt.figure(figsize=(8, 8))
-    plt.imshow(data_matrix, extent=(min_x, max_x, min_y, max_y), cmap='tab20c', origin='lower', aspect='equal')
-    plt.colorbar(label='Data values')
-    vor = Voronoi(partition_coordinates)
-    voronoi_plot_2d(vor, show_vertices=False, line_colors='black', line_width=2, line_alpha=0.6, point_size=2,
-                    ax=plt.gca())
-    plt.title('Voronoi Partitioning Overlaid on Data Heatmap')
-    plt.gca().invert_yaxis()
-    plt.grid(False)
-    plt.show()
+def _count_sparse_partitions(dichotomized_data_matrix, partitions, cell_size, window):
+    # Partition counts of a sparse dichotomized matrix: only the positive cells are looked up, the partition sizes are
+    # the clipped Voronoi polygon areas in cells, so the grid itself is never visited
+    num_rows, num_cols, x_cell_size, y_cell_size, min_x, min_y, max_x, max_y = _initialize_parameters(
+        dichotomized_data_matrix, cell_size, window)
+    x_coordinates, y_coordinates = _generate_axis_coordinates(num_rows, num_cols, x_cell_size, y_cell_size, min_x,
+                                                              min_y, max_x, max_y)
+    partition_coordinates = _generate_partition_coordinates(partitions, min_x, max_x, min_y, max_y)
+
+    cells = sparse.coo_matrix(dichotomized_data_matrix)
+    positive_indices = (cells.row.astype(np.int64) * num_cols + cells.col)[cells.data != 0]
+    _, positive_partitions = KDTree(partition_coordinates).query(
+        _cell_coordinates(positive_indices, x_coordinates, y_coordinates))
+    positive_counts = np.bincount(positive_partitions, minlength=len(partition_coordinates))
+
+    area_sizes = _voronoi_areas(partition_coordinates, (min_x, min_y, max_x, max_y)) / (x_cell_size * y_cell_size)
+    plot_spec = PartitionPlotSpec('voronoi', dichotomized_data_matrix, (min_x, max_x, min_y, max_y),
+                                  partition_coordinates)
 
+    partition_ids = np.flatnonzero(area_sizes)
+    return (partition_coordinates, partition_ids + 1, positive_counts[partition_ids], area_sizes[partition_ids],
+            plot_spec)
 
-def spatial_partition(data_matrix, partitions=10, cell_size=1, window=None, plot_output=True):
+
+def spatial_partition(data_matrix, partitions=10, cell_size=1, window=None, plot_output=True, detail='full'):
     _validate_data_matrix(data_matrix)
+    detail = _validate_detail(detail)
+    if sparse.issparse(data_matrix):
+        # The result holds a partition for every cell, so a sparse matrix gains nothing here
+        data_matrix = data_matrix.toarray()
     num_rows, num_cols, x_cell_size, y_cell_size, min_x, min_y, max_x, max_y = _initialize_parameters(data_matrix,
                                                                                                       cell_size, window)
     grid_coordinates = _generate_grid_coordinates(num_rows, num_cols, x_cell_size, y_cell_size, min_x, min_y, max_x,
                                                   max_y)
     partition_coordinates = _generate_partition_coordinates(partitions, min_x, max_x, min_y, max_y)
     nearest_partition_indices = _assign_partitions_to_grid(grid_coordinates, partition_coordinates)
-    data_with_partitions = _create_data_frame(grid_coordinates, data_matrix, nearest_partition_indices)
+    plot_spec = PartitionPlotSpec('voronoi', data_matrix, (min_x, max_x, min_y, max_y), partition_coordinates)
 
     if plot_output:
-        _plot_partitioned_data(data_matrix, min_x, max_x, min_y, max_y, partition_coordinates)
+        _show_plot(plot_spec)
 
+    if detail != 'full':
+        return PartitionResult(partition_coordinates=partition_coordinates,
+                               partition_indices=nearest_partition_indices + 1,
+                               plot_spec=plot_spec if detail == 'arrays' else None)
+
+    data_with_partitions = _create_data_frame(grid_coordinates, data_matrix, nearest_partition_indices)
     return {
         'partition_coordinates': partition_coordinates,
-        'data_with_partitions': data_with_partitions
+        'data_with_partitions': data_with_partitions,
+        'plot_spec': plot_spec
     }
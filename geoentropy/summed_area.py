@@ -0,0 +1,75 @@
+import numpy as np
+from scipy import sparse
+from .results import PartitionPlotSpec
+
+
+def _summed_area_table(data_matrix):
+    # Zero-padded in the first row and column, so every block sum is four lookups without boundary checks
+    num_rows, num_cols = data_matrix.shape
+    table = np.zeros((num_rows + 1, num_cols + 1), dtype=np.int64)
+    np.cumsum(np.cumsum(data_matrix, axis=0, dtype=np.int64), axis=1, out=table[1:, 1:])
+    return table
+
+
+def _validate_blocks(blocks):
+    if isinstance(blocks, (int, np.integer)):
+        blocks = (blocks, blocks)
+    if len(blocks) != 2 or not all(isinstance(number, (int, np.integer)) and number >= 1 for number in blocks):
+        raise ValueError("For block partitions, please provide the number of blocks as a positive integer or a tuple "
+                         "(row_blocks, col_blocks) of positive integers.")
+    return blocks
+
+
+def _block_edges(length, blocks):
+    # More blocks than cells along an axis collapse to one block per cell
+    return np.unique(np.round(np.linspace(0, length, min(blocks, length) + 1)).astype(int))
+
+
+def _block_sums(table, row_edges, col_edges):
+    corners = table[np.ix_(row_edges, col_edges)]
+    return corners[1:, 1:] - corners[:-1, 1:] - corners[1:, :-1] + corners[:-1, :-1]
+
+
+def _sparse_block_sums(dichotomized_data_matrix, row_edges, col_edges):
+    # Only the positive cells are binned, the cost does not depend on the extent of the grid
+    cells = sparse.coo_matrix(dichotomized_data_matrix)
+    positive = cells.data != 0
+    block_rows = np.searchsorted(row_edges, cells.row[positive], side='right') - 1
+    block_cols = np.searchsorted(col_edges, cells.col[positive], side='right') - 1
+    num_block_cols = len(col_edges) - 1
+    return np.bincount(block_rows * num_block_cols + block_cols,
+                       minlength=(len(row_edges) - 1) * num_block_cols).reshape(-1, num_block_cols)
+
+
+def _block_areas(row_edges, col_edges):
+    return np.outer(np.diff(row_edges), np.diff(col_edges))
+
+
+def _block_centers(row_edges, col_edges, cell_size, window):
+    if isinstance(cell_size, (int, float)):
+        x_cell_size = y_cell_size = cell_size
+    else:
+        x_cell_size, y_cell_size = cell_size
+    min_x, min_y = (0, 0) if window is None else window[:2]
+    x_centers = min_x + (col_edges[:-1] + col_edges[1:]) / 2 * x_cell_size
+    y_centers = min_y + (row_edges[:-1] + row_edges[1:]) / 2 * y_cell_size
+    x_grid, y_grid = np.meshgrid(x_centers, y_centers)
+    return np.column_stack((x_grid.ravel(), y_grid.ravel()))
+
+
+def _partition_into_blocks(dichotomized_data_matrix, blocks, cell_size=1, window=None):
+    num_rows, num_cols = dichotomized_data_matrix.shape
+    row_blocks, col_blocks = _validate_blocks(blocks)
+    row_edges = _block_edges(num_rows, row_blocks)
+    col_edges = _block_edges(num_cols, col_blocks)
+
+    if sparse.issparse(dichotomized_data_matrix):
+        positive_counts = _sparse_block_sums(dichotomized_data_matrix, row_edges, col_edges).ravel()
+    else:
+        positive_counts = _block_sums(_summed_area_table(dichotomized_data_matrix), row_edges, col_edges).ravel()
+    area_sizes = _block_areas(row_edges, col_edges).ravel()
+    partitions = np.arange(1, len(area_sizes) + 1)
+    plot_spec = PartitionPlotSpec('blocks', dichotomized_data_matrix, (0, num_cols, 0, num_rows), row_edges=row_edges,
+                                  col_edges=col_edges)
+
+    return partitions, positive_counts, area_sizes, _block_centers(row_edges, col_edges, cell_size, window), plot_spec
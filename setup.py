@@ -6,6 +6,7 @@ setup(
     packages=find_packages(),
     install_requires=['numpy', 'pandas', 'matplotlib', 'scipy', 'shapely'],
     include_package_data=True,
+    entry_points={'console_scripts': ['geoentropy=geoentropy.cli:main']},
     description='A Python package for computing geometric/spatial entropy metrics for data in matrix format.',
     long_description=open('README.md').read(),
     long_description_content_type='text/markdown',
@@ -0,0 +1,21 @@
+from geoentropy import batty, batty_profile
+import numpy as np
+
+data_matrix = np.array([
+    [1, 2, 1, 1, 2, 2, 1, 1],
+    [1, 1, 2, 2, 2, 2, 1, 1],
+    [2, 2, 1, 1, 1, 2, 2, 1],
+    [1, 1, 2, 2, 1, 1, 2, 2],
+    [1, 1, 1, 1, 2, 2, 2, 2],
+    [2, 2, 1, 2, 1, 1, 1, 2]
+])
+
+result = batty(data_matrix, category=1, partitions=(2, 4), partition_mode='blocks', plot_output=False)
+
+print("Batty Entropy:", result['batty_entropy'])
+print("Entropy Range:", result['entropy_range'])
+print("Area Data:\n", result['area_data'])
+
+result = batty_profile(data_matrix, category=1)
+
+print("Batty Entropy Profile:\n", result['profile'].to_string())
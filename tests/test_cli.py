@@ -0,0 +1,38 @@
+from geoentropy.cli import main
+import numpy as np
+import os
+import tempfile
+
+input_directory = tempfile.mkdtemp()
+np.save(os.path.join(input_directory, 'raster.npy'), np.array([
+    [1, 2, 1, 3],
+    [2, 1, 3, 3],
+    [1, 1, 2, 2],
+    [3, 3, 1, 1]
+]))
+np.savez(os.path.join(input_directory, 'rasters.npz'), first=np.eye(4), second=np.ones((3, 3)) * 2)
+output_path = os.path.join(input_directory, 'results.jsonl')
+
+main([input_directory, 'coordinates_category_1.csv', '--output', output_path, '--metrics', 'shannon,oneill,batty',
+      '--workers', '2', '--seed', '42'])
+
+# A second run skips every input that is already in the output file, including the failed one
+main([input_directory, 'coordinates_category_1.csv', '--output', output_path, '--metrics', 'shannon,oneill,batty'])
+
+# Retrying replaces the error record of the failed input instead of adding another one
+main([input_directory, '--output', output_path, '--metrics', 'shannon,oneill', '--retry-failed'])
+
+with open(output_path) as output_file:
+    print(output_file.read())
+
+arrays_output_path = os.path.join(input_directory, 'arrays.jsonl')
+main([os.path.join(input_directory, 'raster.npy'), '--output', arrays_output_path, '--metrics', 'shannon,oneill',
+      '--detail', 'arrays'])
+
+with open(arrays_output_path) as output_file:
+    print(output_file.read())
+
+# A pattern without any supported file is reported and makes the run fail
+exit_code = main([os.path.join(input_directory, 'raster.npy'), os.path.join(input_directory, 'missing.npy'),
+                  '--output', os.path.join(input_directory, 'missing.jsonl'), '--metrics', 'shannon'])
+print("Exit Code:", exit_code)
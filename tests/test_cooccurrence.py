@@ -0,0 +1,17 @@
+from geoentropy import cooccurrence
+import numpy as np
+
+data_matrix = np.array([
+    [1, 2, 1, 2, 1, 2],
+    [1, 2, 1, 2, 1, 2],
+    [1, 2, 1, 2, np.nan, 2],
+    [1, 2, 1, 2, 1, 2],
+    [1, 2, 1, 2, 1, 2]
+])
+
+result = cooccurrence(data_matrix, cell_size=1, critical_distance=2, sectors=4, plot_output=True)
+
+print("O'Neill Entropy:", result['oneill_entropy'])
+print("Leibovici Entropy:", result['leibovici_entropy'])
+print("Entropy per Direction Sector:\n", result['sector_entropy'])
+print("Entropy per Distance:\n", result['distance_entropy'])
@@ -0,0 +1,12 @@
+from geoentropy import entropy_pyramid
+import numpy as np
+
+np.random.seed(1)
+data_matrix = np.kron(np.random.randint(1, 4, (4, 4)), np.ones((4, 4)))
+data_matrix[np.random.rand(*data_matrix.shape) < 0.2] = 4
+data_matrix[0, :3] = np.nan
+
+result = entropy_pyramid(data_matrix, factor=2, cell_size=1, critical_distance=None, plot_output=True)
+
+print("Entropy Pyramid:\n", result['pyramid'].to_string())
+print("Coarsest Level:\n", result['matrices'][-1])
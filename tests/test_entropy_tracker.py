@@ -0,0 +1,15 @@
+from geoentropy import EntropyTracker, leibovici, oneill
+import numpy as np
+
+np.random.seed(1)
+data_matrix = np.random.randint(1, 4, (50, 50))
+
+tracker = EntropyTracker(data_matrix, cell_size=1, critical_distance=2, categories=[1, 2, 3, 4])
+for step in range(10):
+    rows, cols = np.random.randint(0, 50, 20), np.random.randint(0, 50, 20)
+    result = tracker.update(rows, cols, np.random.randint(1, 5, 20))
+    print("Step", step, result)
+
+print("O'Neill Entropy from scratch:", oneill(tracker.data_matrix)['oneill_entropy'])
+print("Leibovici Entropy from scratch:",
+      leibovici(tracker.data_matrix, critical_distance=2, plot_output=False)['leibovici_entropy'])
@@ -14,3 +14,16 @@ print("Leibovici Entropy:", result['leibovici_entropy'])
 print("Entropy Range:", result['entropy_range'])
 print("Relative Leibovici Entropy:", result['relative_leibovici_entropy'])
 print("Probability Distribution:\n", result['probability_distribution'])
+
+result = leibovici(data_matrix, cell_size=1, critical_distance=2, plot_output=False, method='sampled',
+                   tolerance=0.05, seed=1)
+
+print("Sampled Leibovici Entropy:", result['leibovici_entropy'])
+print("Confidence Interval:", result['confidence_interval'])
+print("Samples:", result['samples'])
+
+result = leibovici(data_matrix, cell_size=1, critical_distance=2, plot_output=False, detail='arrays', method='sampled',
+                   tolerance=0.05, seed=1)
+
+print("Sampled Categories:", result.categories)
+print("Sampled Entropy Range:", result.entropy_range)
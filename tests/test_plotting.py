@@ -0,0 +1,20 @@
+from geoentropy import batty, karlstrom, render_plot, render_plots
+import numpy as np
+import os
+import tempfile
+
+np.random.seed(1)
+data_matrix = np.random.randint(1, 3, (40, 60))
+events = np.random.uniform(0, 10, (200, 2))
+
+plot_specs = [
+    batty(data_matrix, category=1, partitions=6, plot_output=False)['plot_spec'],
+    batty(data_matrix, category=1, partitions=(2, 3), plot_output=False, partition_mode='blocks')['plot_spec'],
+    karlstrom(events=events, partition=6, observation_window=(0, 0, 10, 10), plot_output=False)['plot_spec']
+]
+
+output_directory = tempfile.mkdtemp()
+print("Single Plot:", render_plot(plot_specs[0], os.path.join(output_directory, 'single.png')))
+output_paths = render_plots(plot_specs, [os.path.join(output_directory, f"plot_{index}.png")
+                                         for index in range(len(plot_specs))], workers=3)
+print("Plot Files:", [os.path.getsize(path) > 0 for path in output_paths])
@@ -0,0 +1,33 @@
+from geoentropy import batty, karlstrom
+import numpy as np
+
+np.random.seed(1)
+events = np.vstack((np.random.normal(30, 5, (300, 2)), np.random.uniform(0, 100, (200, 2))))
+weights = np.random.uniform(0.5, 2, len(events))
+
+result = batty(events=events, weights=weights, partitions=10, window=(0, 0, 100, 100), plot_output=True)
+
+print("Batty Entropy:", result['batty_entropy'])
+print("Entropy Range:", result['entropy_range'])
+print("Area Data:\n", result['area_data'])
+
+result = karlstrom(events=events, weights=weights, partition=10, observation_window=(0, 0, 100, 100), neighbors=3,
+                   plot_output=True)
+
+print("Karlström Entropy:", result['karlstrom_entropy'])
+print("Relative Karlström Entropy:", result['relative_karlstrom_entropy'])
+
+# A window smaller than one unit of the coordinates, measured in cells of 0.01
+events = np.random.uniform(0, 0.5, (200, 2))
+
+result = batty(events=events, cell_size=0.01, partitions=5, window=(0, 0, 0.5, 0.5), plot_output=False)
+
+print("Batty Entropy:", result['batty_entropy'])
+print("Entropy Range:", result['entropy_range'])
+print("Relative Batty Entropy:", result['relative_batty_entropy'])
+
+result = karlstrom(events=events, cell_size=0.01, partition=5, observation_window=(0, 0, 0.5, 0.5), neighbors=2,
+                   plot_output=False)
+
+print("Karlström Entropy:", result['karlstrom_entropy'])
+print("Relative Karlström Entropy:", result['relative_karlstrom_entropy'])
@@ -0,0 +1,19 @@
+from geoentropy import oneill, shannon
+import numpy as np
+
+data_matrix = np.array([
+    [1, 2, 1, 3],
+    [2, 1, 3, 3],
+    [1, 1, 2, 2],
+    [3, 3, 1, 1]
+])
+
+result = oneill(data_matrix, detail='arrays')
+
+print("O'Neill Entropy:", result.oneill_entropy)
+print("Entropy Range:", result.entropy_range)
+print("Categories:", result.categories)
+print("Pair Codes:", result.pair_codes.tolist())
+print("Pair Counts:", result.pair_counts)
+
+print(shannon(data_matrix, detail='summary'))
@@ -0,0 +1,24 @@
+from geoentropy import batty, batty_profile, karlstrom, leibovici, oneill, shannon
+from scipy import sparse
+import numpy as np
+
+np.random.seed(1)
+data_matrix = sparse.random(200, 300, density=0.02, format='csr',
+                            data_rvs=lambda size: np.random.randint(1, 4, size)).astype(int)
+
+shannon_result = shannon(data_matrix, detail='summary')
+oneill_result = oneill(data_matrix, plot_output=False, detail='summary')
+leibovici_result = leibovici(data_matrix, cell_size=1, critical_distance=2, plot_output=False, detail='summary')
+batty_result = batty(data_matrix, category=1, partitions=(4, 6), plot_output=True, detail='summary',
+                     partition_mode='blocks')
+profile_result = batty_profile(data_matrix, category=1, detail='summary')
+karlstrom_result = karlstrom(data_matrix, category=2, partition=8, plot_output=False, detail='arrays')
+
+print("Shannon Entropy:", shannon_result.shannon_entropy)
+print("O'Neill Entropy:", oneill_result.oneill_entropy)
+print("Leibovici Entropy:", leibovici_result.leibovici_entropy)
+print("Batty Entropy:", batty_result.batty_entropy)
+print("Relative Batty Entropy Profile:", profile_result.relative_batty_entropy)
+print("Karlström Entropy:", karlstrom_result.karlstrom_entropy)
+print("Karlström Area Sizes:", karlstrom_result.area_sizes)
+print("Dense O'Neill Entropy:", oneill(data_matrix.toarray(), plot_output=False, detail='summary').oneill_entropy)